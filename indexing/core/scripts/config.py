@@ -22,6 +22,10 @@ class NodeType(str, Enum):
     SECTION = "section"
 
 
+# Compact integer codes for columnar (struct-of-arrays) entity storage
+NODE_TYPE_CODES = {node_type: code for code, node_type in enumerate(NodeType)}
+
+
 class EdgeType(str, Enum):
     """Types of relationships in the medical knowledge graph"""
     PRESENTS_WITH = "presents_with"  # Disease -> Symptom
@@ -1,14 +1,137 @@
 """Graph builder service for populating medical knowledge graph using Microsoft GraphRAG."""
 import logging
-from typing import List, Optional, Dict, Any
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 import asyncio
 
-from parsers import WillsEyeParser, ParsedCondition, MedicalEntity, MedicalRelationship
-from config import NodeType, EdgeType, UrgencyLevel
+from neo4j import AsyncDriver, AsyncGraphDatabase
+
+from parsers import (
+    WillsEyeParser,
+    ParsedCondition,
+    MedicalEntityColumns,
+    MedicalRelationship,
+)
+from config import (
+    NodeType, EdgeType, UrgencyLevel, NODE_TYPE_CODES,
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD,
+)
 
 logger = logging.getLogger(__name__)
 
+# Structured condition fields merged straight into Neo4j (no LLM extraction)
+STRUCTURED_FIELD_EDGES = {
+    NodeType.SYMPTOM: EdgeType.PRESENTS_WITH,
+    NodeType.SIGN: EdgeType.SHOWS_SIGN,
+    NodeType.TREATMENT: EdgeType.TREATED_WITH,
+    NodeType.MEDICATION: EdgeType.TREATED_WITH,
+    NodeType.ETIOLOGY: EdgeType.CAUSED_BY,
+    NodeType.DIFFERENTIAL: EdgeType.DIFFERENTIATES,
+}
+
+STRUCTURED_LABELS = {
+    node_type.value: node_type.value.title().replace("_", "")
+    for node_type in STRUCTURED_FIELD_EDGES
+}
+
+# One UNWIND MERGE query per structured field (labels cannot be parameters)
+STRUCTURED_MERGE_QUERIES = {
+    node_type.value: f"""
+        UNWIND $rows AS row
+        MERGE (c:Disease {{name: row.condition}})
+          ON CREATE SET c.chapter = row.chapter, c.urgency_level = row.urgency_level
+        MERGE (e:{STRUCTURED_LABELS[node_type.value]} {{name: row.name}})
+        MERGE (c)-[:{edge_type.value.upper()}]->(e)
+    """
+    for node_type, edge_type in STRUCTURED_FIELD_EDGES.items()
+}
+
+# Unique names let concurrent MERGEs of the same node wait on the constraint
+# lock instead of each creating their own copy
+STRUCTURED_CONSTRAINTS = [
+    f"CREATE CONSTRAINT {label.lower()}_name IF NOT EXISTS "
+    f"FOR (n:{label}) REQUIRE n.name IS UNIQUE"
+    for label in ["Disease", *sorted(set(STRUCTURED_LABELS.values()))]
+]
+
+STRUCTURED_MERGE_BATCH_SIZE = 1000
+
+
+class _SearchBatcher:
+    """Micro-batcher that dispatches searches submitted close together concurrently.
+
+    Requests arriving within ``flush_interval_ms`` of each other (or until
+    ``max_batch_size`` are pending) are flushed as one ``asyncio.gather`` burst.
+    """
+
+    def __init__(self, flush_interval_ms: float = 10, max_batch_size: int = 8):
+        """Initialize batcher.
+
+        Args:
+            flush_interval_ms: Maximum time a request waits before dispatch
+            max_batch_size: Number of pending requests that forces a flush
+        """
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[Callable[..., Awaitable[Any]], tuple, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, search_fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Queue a search and wait for its result.
+
+        Args:
+            search_fn: Coroutine function performing the search
+            *args: Arguments for ``search_fn``
+
+        Returns:
+            Result of ``search_fn(*args)``
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((search_fn, args, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch all pending searches."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._dispatch(pending))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(
+        self,
+        pending: List[Tuple[Callable[..., Awaitable[Any]], tuple, asyncio.Future]],
+    ) -> None:
+        """Run a batch of searches concurrently and resolve their futures.
+
+        Args:
+            pending: Queued (search function, arguments, future) entries
+        """
+        results = await asyncio.gather(
+            *(search_fn(*args) for search_fn, args, _ in pending),
+            return_exceptions=True,
+        )
+        for (_, _, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
 
 class MedicalGraphBuilder:
     """Service for building medical knowledge graph from parsed Wills Eye data using GraphRAG."""
@@ -17,12 +140,37 @@ class MedicalGraphBuilder:
         """Initialize graph builder with GraphRAG backend."""
         # TODO: Initialize GraphRAG client when implementation is complete
         # Currently structured to receive GraphRAG client from indexing pipeline
+        # Structured fields bypass GraphRAG and are merged directly via Cypher;
+        # the driver is opened on first use
+        self._driver: Optional[AsyncDriver] = None
+        self._schema_lock = asyncio.Lock()
+        self._schema_ready = False
         self.batch_buffer: List[ParsedCondition] = []
-        self.stats = {
+        self.stats: Counter = Counter({
             "conditions_processed": 0,
-            "episodes_created": 0,
+            "entities_merged": 0,
             "errors": 0,
-        }
+        })
+        self._search_batcher = _SearchBatcher()
+
+    @property
+    def driver(self) -> AsyncDriver:
+        """Neo4j driver for structured merges, opened on first use.
+
+        Raises:
+            ValueError: If NEO4J_PASSWORD is not set
+        """
+        if self._driver is None:
+            if not NEO4J_PASSWORD:
+                raise ValueError(
+                    "NEO4J_PASSWORD environment variable is required to merge "
+                    "structured fields into Neo4j. "
+                    "Set it with: export NEO4J_PASSWORD='your_password'"
+                )
+            self._driver = AsyncGraphDatabase.driver(
+                NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)
+            )
+        return self._driver
 
     async def build_from_chapter(
         self,
@@ -47,14 +195,22 @@ class MedicalGraphBuilder:
             conditions = parser.parse_chapter(chapter_name)
             logger.info(f"Parsed {len(conditions)} conditions from {chapter_name}")
 
-            # Process conditions in batches
+            # Process conditions in batches, logging progress every 10%
+            total_batches = (len(conditions) + batch_size - 1) // batch_size
+            last_logged_pct = 0
             for i in range(0, len(conditions), batch_size):
                 batch = conditions[i:i + batch_size]
                 await self._process_batch(batch)
 
-                logger.info(
-                    f"Processed batch {i//batch_size + 1}/{(len(conditions)-1)//batch_size + 1}"
-                )
+                batch_num = i // batch_size + 1
+                pct = 100 * batch_num // total_batches
+                if pct >= last_logged_pct + 10 or batch_num == total_batches:
+                    logger.info(
+                        "Processed batch %d/%d (%d%%)", batch_num, total_batches, pct
+                    )
+                    last_logged_pct = pct
+                else:
+                    logger.debug("Processed batch %d/%d", batch_num, total_batches)
 
             logger.info(f"Completed processing chapter: {chapter_name}")
             return self.stats
@@ -91,82 +247,128 @@ class MedicalGraphBuilder:
     async def _process_batch(self, conditions: List[ParsedCondition]) -> None:
         """Process a batch of conditions.
 
+        The structured rows of the whole batch go out in one
+        bulk_merge_structured() call, so a batch is one set of write
+        transactions rather than one per condition.
+
         Args:
             conditions: List of parsed conditions to process
         """
-        tasks = []
+        rows: List[Dict[str, Any]] = []
+        merged = 0
         for condition in conditions:
-            task = self._add_condition_to_graph(condition)
-            tasks.append(task)
+            condition_rows = self._condition_rows(condition)
+            if condition_rows:
+                rows.extend(condition_rows)
+                merged += 1
+
+        # Missing credentials or schema errors fail every batch; raise them
+        if rows:
+            await self._ensure_structured_schema()
+
+        try:
+            await self.bulk_merge_structured(rows)
+        except Exception as e:
+            logger.error(f"Error merging batch of {merged} conditions: {e}")
+            self.stats["errors"] += merged
+            self.stats["conditions_processed"] += len(conditions) - merged
+            return
 
-        # Process batch concurrently
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # TODO: Send unstructured free text to GraphRAG indexing pipeline
+        # GraphRAG indexing is handled by graphrag_indexer.py
+        self.stats["conditions_processed"] += len(conditions)
+        self.stats["entities_merged"] += len(rows)
 
-    async def _add_condition_to_graph(self, condition: ParsedCondition) -> None:
-        """Add a single medical condition to the knowledge graph.
+    def _condition_rows(self, condition: ParsedCondition) -> List[Dict[str, Any]]:
+        """Build the structured merge rows for a single medical condition.
 
         Args:
             condition: Parsed medical condition
 
+        Returns:
+            Rows for bulk_merge_structured(), empty if it has no entities
+
         Note:
             This method extracts and structures medical data from parsed conditions.
             The actual GraphRAG indexing is handled by the indexing pipeline.
         """
-        try:
-            # Extract data from parsed condition
-            symptoms = self._extract_entities_by_type(
-                condition.entities, NodeType.SYMPTOM
-            )
-            signs = self._extract_entities_by_type(
-                condition.entities, NodeType.SIGN
-            )
-            treatments = self._extract_entities_by_type(
-                condition.entities, NodeType.TREATMENT
-            )
-            treatments.extend(
-                self._extract_entities_by_type(condition.entities, NodeType.MEDICATION)
-            )
-            etiologies = self._extract_entities_by_type(
-                condition.entities, NodeType.ETIOLOGY
-            )
-            differentials = self._extract_entities_by_type(
-                condition.entities, NodeType.DIFFERENTIAL
-            )
-
-            # TODO: Send structured data to GraphRAG indexing pipeline
-            # For now, just track processing statistics
-            # GraphRAG indexing is handled by graphrag_indexer.py
+        if not condition.entities:
+            return []
 
-            self.stats["conditions_processed"] += 1
-            self.stats["episodes_created"] += 1
+        # Structured fields are already clean lists; merge them directly
+        columns = condition.entity_columns
+        return [
+            {
+                "condition": condition.condition_name,
+                "chapter": condition.chapter,
+                "urgency_level": condition.urgency_level.value,
+                "node_type": node_type.value,
+                "name": name,
+            }
+            for node_type in STRUCTURED_FIELD_EDGES
+            for name in self._extract_entities_by_type(columns, node_type)
+        ]
 
-            logger.debug(f"Processed condition for GraphRAG: {condition.condition_name}")
+    async def _ensure_structured_schema(self) -> None:
+        """Create the name uniqueness constraints once, before the first merge."""
+        async with self._schema_lock:
+            if self._schema_ready:
+                return
+            async with self.driver.session() as session:
+                for query in STRUCTURED_CONSTRAINTS:
+                    result = await session.run(query)
+                    await result.consume()
+            self._schema_ready = True
+
+    async def bulk_merge_structured(self, rows: List[Dict[str, Any]]) -> None:
+        """Merge structured condition fields into Neo4j with UNWIND batches.
+
+        Concurrent chapters may merge the same nodes; the uniqueness
+        constraints prevent duplicates, rows are sorted so transactions take
+        node locks in the same order, and execute_write() retries any
+        deadlock that still occurs.
 
-        except Exception as e:
-            logger.error(
-                f"Error processing condition {condition.condition_name}: {e}"
-            )
-            self.stats["errors"] += 1
+        Args:
+            rows: Rows with condition, chapter, urgency_level, node_type and name
+        """
+        if not rows:
+            return
+        await self._ensure_structured_schema()
+
+        rows_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for row in sorted(rows, key=lambda row: (row["condition"], row["name"])):
+            rows_by_type.setdefault(row["node_type"], []).append(row)
+
+        async with self.driver.session() as session:
+            for node_type, type_rows in rows_by_type.items():
+                query = STRUCTURED_MERGE_QUERIES[node_type]
+                for i in range(0, len(type_rows), STRUCTURED_MERGE_BATCH_SIZE):
+                    batch = type_rows[i:i + STRUCTURED_MERGE_BATCH_SIZE]
+                    await session.execute_write(self._run_merge, query, batch)
+
+    @staticmethod
+    async def _run_merge(tx, query: str, rows: List[Dict[str, Any]]) -> None:
+        """Run one UNWIND MERGE batch inside a write transaction."""
+        result = await tx.run(query, rows=rows)
+        await result.consume()
 
     def _extract_entities_by_type(
         self,
-        entities: List[MedicalEntity],
+        entities: MedicalEntityColumns,
         node_type: NodeType,
     ) -> List[str]:
         """Extract entity names of a specific type.
 
         Args:
-            entities: List of medical entities
+            entities: Columnar view of medical entities
             node_type: Type of node to extract
 
         Returns:
             List of entity names
         """
-        return [
-            entity.name
-            for entity in entities
-            if entity.node_type == node_type
-        ]
+        return entities.names[
+            entities.type_codes == NODE_TYPE_CODES[node_type]
+        ].tolist()
 
     async def search_conditions_by_symptom(
         self,
@@ -184,9 +386,20 @@ class MedicalGraphBuilder:
         Returns:
             List of matching conditions
         """
+        return await self._search_batcher.submit(
+            self._search_conditions_by_symptom, symptom, urgency_filter, num_results
+        )
+
+    async def _search_conditions_by_symptom(
+        self,
+        symptom: str,
+        urgency_filter: Optional[str],
+        num_results: int,
+    ) -> List[Dict[str, Any]]:
+        """Run a symptom search against GraphRAG (dispatched by the batcher)."""
         # TODO: Implement GraphRAG search when backend is ready
         # This would use GraphRAG's local/global search capabilities
-        logger.info(f"GraphRAG search for symptom: {symptom}")
+        logger.info("GraphRAG search for symptom: %s", symptom)
         return []
 
     async def get_treatment_recommendations(
@@ -204,7 +417,7 @@ class MedicalGraphBuilder:
             List of treatment recommendations
         """
         # TODO: Implement GraphRAG search when backend is ready
-        logger.info(f"GraphRAG search for treatments: {disease}")
+        logger.info("GraphRAG search for treatments: %s", disease)
         return []
 
     async def get_differential_diagnosis(
@@ -222,7 +435,7 @@ class MedicalGraphBuilder:
             List of potential diagnoses
         """
         # TODO: Implement GraphRAG search when backend is ready
-        logger.info(f"GraphRAG search for differential diagnosis: {symptoms}")
+        logger.info("GraphRAG search for differential diagnosis: %s", symptoms)
         return []
 
     async def check_for_red_flags(
@@ -239,8 +452,18 @@ class MedicalGraphBuilder:
         Returns:
             List of potential emergent conditions
         """
+        return await self._search_batcher.submit(
+            self._check_for_red_flags, symptoms, num_results
+        )
+
+    async def _check_for_red_flags(
+        self,
+        symptoms: List[str],
+        num_results: int,
+    ) -> List[Dict[str, Any]]:
+        """Run a red flag search against GraphRAG (dispatched by the batcher)."""
         # TODO: Implement GraphRAG red flag detection when backend is ready
-        logger.info(f"GraphRAG red flag check: {symptoms}")
+        logger.info("GraphRAG red flag check: %s", symptoms)
         return []
 
     def get_stats(self) -> Dict[str, int]:
@@ -255,6 +478,13 @@ class MedicalGraphBuilder:
         """Close graph builder."""
         logger.info("Graph builder closed")
 
+    async def aclose(self) -> None:
+        """Close the Neo4j driver, if it was opened, and the graph builder."""
+        if self._driver is not None:
+            await self._driver.close()
+            self._driver = None
+        self.close()
+
     def __enter__(self):
         """Context manager entry."""
         return self
@@ -292,7 +522,8 @@ class GraphIndexer:
         Returns:
             Indexing results with statistics
         """
-        self.start_time = datetime.now()
+        # Chapters may be indexed concurrently; time each from a local start
+        start_time = self.start_time = datetime.now()
         logger.info(f"Starting indexing of chapter: {chapter_name}")
 
         try:
@@ -301,7 +532,7 @@ class GraphIndexer:
             )
 
             self.end_time = datetime.now()
-            duration = (self.end_time - self.start_time).total_seconds()
+            duration = (self.end_time - start_time).total_seconds()
 
             return {
                 "chapter": chapter_name,
@@ -376,25 +607,32 @@ class GraphIndexer:
             ("mild allergic conjunctivitis", "NON_URGENT"),
         ]
 
-        for query, expected_urgency in test_queries:
-            try:
-                results = await self.builder.search_conditions_by_symptom(
+        # Run test queries concurrently; the search batcher flushes them together
+        all_results = await asyncio.gather(
+            *(
+                self.builder.search_conditions_by_symptom(
                     query, urgency_filter=None, num_results=5
                 )
+                for query, _ in test_queries
+            ),
+            return_exceptions=True,
+        )
 
+        for (query, expected_urgency), results in zip(test_queries, all_results):
+            if isinstance(results, Exception):
                 validations.append({
                     "query": query,
-                    "expected_urgency": expected_urgency,
-                    "results_found": len(results),
-                    "passed": len(results) > 0,
-                })
-
-            except Exception as e:
-                validations.append({
-                    "query": query,
-                    "error": str(e),
+                    "error": str(results),
                     "passed": False,
                 })
+                continue
+
+            validations.append({
+                "query": query,
+                "expected_urgency": expected_urgency,
+                "results_found": len(results),
+                "passed": len(results) > 0,
+            })
 
         return {
             "validations": validations,
@@ -405,6 +643,10 @@ class GraphIndexer:
         """Close indexer."""
         self.builder.close()
 
+    async def aclose(self) -> None:
+        """Close indexer and its Neo4j driver."""
+        await self.builder.aclose()
+
 
 # Example usage
 if __name__ == "__main__":
@@ -430,7 +672,7 @@ if __name__ == "__main__":
             print(f"Search results for 'eye pain': {len(results)} found")
 
         finally:
-            indexer.close()
+            await indexer.aclose()
 
     # Run async main
     asyncio.run(main())
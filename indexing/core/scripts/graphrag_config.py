@@ -1,8 +1,12 @@
 """Configuration for Microsoft GraphRAG implementation."""
 import os
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
-from pydantic import BaseModel, Field
+
+# Live view of the environment; read when a config is created so values
+# loaded by load_dotenv() after import are still picked up
+_ENV = os.environ
 
 
 class LLMProvider(str, Enum):
@@ -17,64 +21,85 @@ class EmbeddingProvider(str, Enum):
     SENTENCE_TRANSFORMERS = "sentence_transformers"
 
 
-class GraphRAGConfig(BaseModel):
-    """GraphRAG configuration."""
+@dataclass(frozen=True, slots=True)
+class GraphRAGConfig:
+    """GraphRAG configuration.
+
+    Provider fields hold the enum values (plain strings).
+    """
 
     # Neo4j Configuration
-    neo4j_uri: str = Field(default_factory=lambda: os.getenv("NEO4J_URI", "bolt://localhost:7687"))
-    neo4j_user: str = Field(default_factory=lambda: os.getenv("NEO4J_USER", "neo4j"))
-    neo4j_password: str = Field(default_factory=lambda: os.getenv("NEO4J_PASSWORD", "password"))
+    neo4j_uri: str = field(default_factory=lambda: _ENV.get("NEO4J_URI", "bolt://localhost:7687"))
+    neo4j_user: str = field(default_factory=lambda: _ENV.get("NEO4J_USER", "neo4j"))
+    neo4j_password: str = field(default_factory=lambda: _ENV.get("NEO4J_PASSWORD", "password"))
+    neo4j_max_pool_size: int = 50
+    neo4j_acquisition_timeout_seconds: float = 60.0
+    neo4j_max_connection_lifetime_seconds: float = 3600.0
 
     # LLM Configuration
-    llm_provider: LLMProvider = Field(default=LLMProvider.OPENAI)
-    openai_api_key: Optional[str] = Field(default_factory=lambda: os.getenv("OPENAI_API_KEY"))
-    openai_base_url: Optional[str] = Field(default_factory=lambda: os.getenv("OPENAI_BASE_URL"))
-    openai_model: str = Field(default="gpt-4o")
-    anthropic_api_key: Optional[str] = Field(default_factory=lambda: os.getenv("ANTHROPIC_API_KEY"))
-    anthropic_model: str = Field(default="claude-3-5-sonnet-20241022")
+    llm_provider: str = LLMProvider.OPENAI.value
+    openai_api_key: Optional[str] = field(default_factory=lambda: _ENV.get("OPENAI_API_KEY"))
+    openai_base_url: Optional[str] = field(default_factory=lambda: _ENV.get("OPENAI_BASE_URL"))
+    openai_model: str = "gpt-4o"
+    anthropic_api_key: Optional[str] = field(default_factory=lambda: _ENV.get("ANTHROPIC_API_KEY"))
+    anthropic_model: str = "claude-3-5-sonnet-20241022"
 
     # Embedding Configuration
-    embedding_provider: EmbeddingProvider = Field(default=EmbeddingProvider.OPENAI)
-    embedding_model: str = Field(default="text-embedding-3-large")
-    embedding_dimensions: int = Field(default=1536)
-    biobert_model: str = Field(default="dmis-lab/biobert-v1.1")
+    embedding_provider: str = EmbeddingProvider.OPENAI.value
+    embedding_model: str = "text-embedding-3-large"
+    embedding_dimensions: int = 1536
+    biobert_model: str = "dmis-lab/biobert-v1.1"
 
     # Entity Extraction Configuration
-    entity_extraction_temperature: float = Field(default=0.1)
-    entity_extraction_max_tokens: int = Field(default=4000)
-    entity_batch_size: int = Field(default=5)
+    entity_extraction_temperature: float = 0.1
+    entity_extraction_max_tokens: int = 4000
+    entity_batch_size: int = 5
 
     # Relationship Extraction Configuration
-    relationship_extraction_temperature: float = Field(default=0.1)
-    relationship_extraction_max_tokens: int = Field(default=2000)
+    relationship_extraction_temperature: float = 0.1
+    relationship_extraction_max_tokens: int = 2000
 
     # Community Detection Configuration
-    community_algorithm: str = Field(default="leiden")  # leiden or louvain
-    community_resolution: float = Field(default=1.0)
-    max_community_levels: int = Field(default=3)
-    min_community_size: int = Field(default=3)
+    community_algorithm: str = "leiden"  # leiden or louvain
+    community_resolution: float = 1.0
+    max_community_levels: int = 3
+    min_community_size: int = 3
 
     # Community Summarization Configuration
-    summary_temperature: float = Field(default=0.3)
-    summary_max_tokens: int = Field(default=500)
+    summary_temperature: float = 0.3
+    summary_max_tokens: int = 500
 
     # Search Configuration
-    local_search_top_k: int = Field(default=10)
-    global_search_top_k: int = Field(default=5)
-    max_context_tokens: int = Field(default=8000)
+    local_search_top_k: int = 10
+    global_search_top_k: int = 5
+    max_context_tokens: int = 8000
 
     # Performance Configuration
-    max_concurrent_requests: int = Field(default=5)
-    retry_attempts: int = Field(default=3)
-    retry_delay_seconds: float = Field(default=1.0)
+    max_concurrent_requests: int = 5
+    retry_attempts: int = 3
+    retry_delay_seconds: float = 1.0
 
     # Logging Configuration
-    log_level: str = Field(default="INFO")
-    log_file: str = Field(default="graphrag_indexing.log")
+    log_level: str = "INFO"
+    log_file: str = "graphrag_indexing.log"
+
+    def __post_init__(self):
+        """Store provider enums as their values, like pydantic's use_enum_values."""
+        for name in ("llm_provider", "embedding_provider"):
+            value = getattr(self, name)
+            if isinstance(value, Enum):
+                object.__setattr__(self, name, value.value)
+
 
-    class Config:
-        """Pydantic config."""
-        use_enum_values = True
+# Required settings, keyed by provider value
+REQUIRED_NEO4J_FIELDS = ("neo4j_uri", "neo4j_user", "neo4j_password")
+LLM_REQUIRED_FIELDS = {
+    LLMProvider.OPENAI.value: (("openai_api_key",), "OpenAI"),
+    LLMProvider.ANTHROPIC.value: (("anthropic_api_key",), "Anthropic"),
+}
+EMBEDDING_REQUIRED_FIELDS = {
+    EmbeddingProvider.OPENAI.value: (("openai_api_key",), "OpenAI"),
+}
 
 
 def load_config() -> GraphRAGConfig:
@@ -99,22 +124,18 @@ def validate_config(config: Optional[GraphRAGConfig] = None) -> None:
         config = load_config()
 
     # Validate Neo4j
-    if not config.neo4j_uri:
-        raise ValueError("NEO4J_URI is required")
-    if not config.neo4j_user:
-        raise ValueError("NEO4J_USER is required")
-    if not config.neo4j_password:
-        raise ValueError("NEO4J_PASSWORD is required")
+    for name in REQUIRED_NEO4J_FIELDS:
+        if not getattr(config, name):
+            raise ValueError(f"{name.upper()} is required")
 
     # Validate LLM
-    if config.llm_provider == LLMProvider.OPENAI:
-        if not config.openai_api_key:
-            raise ValueError("OPENAI_API_KEY is required when using OpenAI")
-    elif config.llm_provider == LLMProvider.ANTHROPIC:
-        if not config.anthropic_api_key:
-            raise ValueError("ANTHROPIC_API_KEY is required when using Anthropic")
+    fields, provider_name = LLM_REQUIRED_FIELDS.get(config.llm_provider, ((), ""))
+    for name in fields:
+        if not getattr(config, name):
+            raise ValueError(f"{name.upper()} is required when using {provider_name}")
 
     # Validate Embedding
-    if config.embedding_provider == EmbeddingProvider.OPENAI:
-        if not config.openai_api_key:
-            raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings")
+    fields, provider_name = EMBEDDING_REQUIRED_FIELDS.get(config.embedding_provider, ((), ""))
+    for name in fields:
+        if not getattr(config, name):
+            raise ValueError(f"{name.upper()} is required for {provider_name} embeddings")
@@ -2,134 +2,550 @@
 
 import argparse
 import json
+import mmap
+import os
+import pickle
 import re
-from neo4j import GraphDatabase
+import sys
+import time
+from neo4j import GraphDatabase, WRITE_ACCESS
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from graphrag_config import GraphRAGConfig, load_config
+
+try:
+    import msgpack
+except ImportError:  # optional, falls back to pickle
+    msgpack = None
+
+# Statement classifier: generated UNWIND blocks expose their literal row list,
+# row variable and per-row body; anything else (schema commands) is run as is
+STATEMENT_SHAPE = re.compile(r"""(?sx)
+    ^(?:
+        UNWIND \s* (?P<rows>\[.*\]) \s* AS \s+ (?P<row_var>\w+) \s+ (?P<body>.*)
+      | (?P<verbatim>.*)
+    )$
+""")
+
+# String literals (skipped) or unquoted map keys, for Cypher -> JSON conversion
+CYPHER_MAP_KEY = re.compile(r'("(?:[^"\\]|\\.)*")|([A-Za-z_]\w*)(?=\s*:)', re.DOTALL)
+
+# Property lookups in MATCH/MERGE patterns, e.g. MATCH (source:Entity {id: ...})
+LOOKUP_PATTERN = re.compile(r"(?:MATCH|MERGE)\s*\(\s*\w*\s*:\s*(\w+)\s*\{\s*(\w+)\s*:")
+
+# Relationship patterns, e.g. CREATE (source)-[r:TREATED_WITH]->(target)
+RELATIONSHIP_PATTERN = re.compile(r"\)\s*<?-\s*\[")
+
+# Statement text between semicolons, treating string literals and // comments
+# as opaque
+STATEMENT_TEXT = re.compile(rb'(?:"(?:[^"\\]|\\.)*"|//[^\n]*|[^";/]+|/)+', re.DOTALL)
+
+# Property values up to this length (types, urgency levels, section names)
+# are shared between rows instead of kept as separate copies
+DEDUPE_MAX_LENGTH = 32
+
+DEFAULT_BATCH_ROWS = 1000
+DEFAULT_CONCURRENCY = 8
+
+# Minimum seconds between progress lines during import
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+# Server versions supporting CALL { ... } IN [n CONCURRENT] TRANSACTIONS
+IN_TRANSACTIONS_VERSION = (4, 4)
+CONCURRENT_TRANSACTIONS_VERSION = (5, 21)
+
+
+_value_cache: Dict[str, str] = {}
+
+
+def _dedupe_value(value: Any) -> Any:
+    """Return a shared copy of short string values (and strings in lists)."""
+    if isinstance(value, str):
+        if len(value) <= DEDUPE_MAX_LENGTH:
+            return _value_cache.setdefault(value, value)
+    elif isinstance(value, list):
+        return [_dedupe_value(item) for item in value]
+    return value
+
+
+def _build_map(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """Build a parsed map with interned keys and deduplicated values."""
+    return {sys.intern(key): _dedupe_value(value) for key, value in pairs}
+
+
+def parse_cypher_literal(text: str) -> Any:
+    """Parse a Cypher list/map literal as written by the Phase 6 generator.
+
+    The generator emits JSON-compatible values with unquoted map keys, so
+    quoting the keys is enough to hand the literal to the JSON parser.
+
+    Args:
+        text: Cypher literal text
+
+    Returns:
+        Equivalent Python value
+    """
+    json_text = CYPHER_MAP_KEY.sub(
+        lambda m: m.group(1) or f'"{m.group(2)}"', text
+    )
+    return json.loads(json_text, strict=False, object_pairs_hook=_build_map)
+
+
+def parameterize_statement(statement: str) -> Optional[Tuple[str, List[Any]]]:
+    """Split a literal UNWIND statement into a parameterized query and its rows.
+
+    Args:
+        statement: Cypher statement
+
+    Returns:
+        Tuple of (query using $rows, rows), or None if not an UNWIND statement
+    """
+    match = STATEMENT_SHAPE.match(statement)
+    if match['verbatim'] is not None:
+        return None
+
+    rows_literal, row_var, body = match.group('rows', 'row_var', 'body')
+    query = sys.intern(f"UNWIND $rows AS {row_var}\n{body}")
+    return query, parse_cypher_literal(rows_literal)
+
+
+def in_transactions(query: str, tx_rows: int, concurrency: Optional[int] = None) -> str:
+    """Wrap a parameterized UNWIND query so the server commits it in chunks.
+
+    Args:
+        query: Query of the form "UNWIND $rows AS <var>\\n<body>"
+        tx_rows: Rows per inner transaction
+        concurrency: Number of inner transactions to run in parallel, or None
+            to run them one after another
+
+    Returns:
+        Query using CALL { ... } IN [n CONCURRENT] TRANSACTIONS
+    """
+    unwind, body = query.split('\n', 1)
+    row_var = unwind.rsplit(' ', 1)[1]
+    concurrent = f"{concurrency} CONCURRENT " if concurrency else ""
+    return (
+        f"{unwind}\n"
+        f"CALL {{\n  WITH {row_var}\n  {body}\n}} IN {concurrent}TRANSACTIONS OF {tx_rows} ROWS"
+    )
+
+
+def iter_statements(filepath: str) -> Iterator[str]:
+    """Stream Cypher statements from a file without loading it into memory.
+
+    Comment lines are dropped; semicolons inside string literals (e.g.
+    treatment descriptions) do not end a statement.
+
+    Args:
+        filepath: Path to .cypher file
+
+    Yields:
+        Individual Cypher statements
+    """
+    with open(filepath, 'rb') as f:
+        if not Path(filepath).stat().st_size:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for match in STATEMENT_TEXT.finditer(buf):
+                lines = [
+                    line for line in match.group().decode('utf-8').split('\n')
+                    if not line.strip().startswith('//')
+                ]
+                statement = '\n'.join(lines).strip()
+                if statement:
+                    yield statement
+
+
+def collect_lookup_keys(queries: Iterable[str]) -> Dict[str, Set[str]]:
+    """Collect the (label, key) pairs used to look up nodes in Cypher queries.
+
+    Args:
+        queries: Query texts without literal row lists
+
+    Returns:
+        Dictionary mapping label to the property keys it is matched on
+    """
+    lookup_keys: Dict[str, Set[str]] = {}
+    for query_text in queries:
+        for label, key in LOOKUP_PATTERN.findall(query_text):
+            lookup_keys.setdefault(label, set()).add(key)
+    return lookup_keys
+
+
+def find_lookup_keys(filepath: str) -> Dict[str, Set[str]]:
+    """Collect the (label, key) pairs used to look up nodes in a Cypher file.
+
+    Args:
+        filepath: Path to .cypher file
+
+    Returns:
+        Dictionary mapping label to the property keys it is matched on
+    """
+    def query_texts() -> Iterator[str]:
+        for statement in iter_statements(filepath):
+            # Only scan the query body, not the literal rows of UNWIND blocks
+            match = STATEMENT_SHAPE.match(statement)
+            yield match['body'] if match['verbatim'] is None else statement
+
+    return collect_lookup_keys(query_texts())
+
+
+def plan_lookup_keys(plan: Iterable[Tuple[str, Optional[List[Any]]]]) -> Dict[str, Set[str]]:
+    """Collect node lookup keys from a parsed import plan without re-reading the file.
+
+    Args:
+        plan: (query, rows) tuples from load_import_plan()
+
+    Returns:
+        Dictionary mapping label to the property keys it is matched on
+    """
+    # Parameterized queries no longer carry their rows, so scan them whole
+    return collect_lookup_keys(query for query, _ in plan)
+
+
+def iter_groups(statements: Iterable[str]) -> Iterator[Tuple[str, Optional[List[Any]]]]:
+    """Merge consecutive UNWIND statements of the same shape into one group.
+
+    Statement order is preserved, so nodes are still created before the
+    relationships that match on them.
+
+    Args:
+        statements: Cypher statements in file order
+
+    Yields:
+        Tuples of (query, rows); rows is None for statements run verbatim
+    """
+    pending_query: Optional[str] = None
+    pending_rows: List[Any] = []
+
+    for statement in statements:
+        parameterized = parameterize_statement(statement)
+
+        if parameterized is None or parameterized[0] != pending_query:
+            if pending_rows:
+                yield pending_query, pending_rows
+            pending_query, pending_rows = None, []
+
+        if parameterized is None:
+            yield statement, None
+            continue
+
+        pending_query = parameterized[0]
+        pending_rows.extend(parameterized[1])
+
+    if pending_rows:
+        yield pending_query, pending_rows
+
+
+def iter_batches(
+    groups: Iterable[Tuple[str, Optional[List[Any]]]],
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[Tuple[str, Optional[List[Any]]]]:
+    """Split statement groups into row batches.
+
+    Args:
+        groups: Tuples of (query, rows) from iter_groups()
+        batch_rows: Maximum rows per parameterized batch
+
+    Yields:
+        Tuples of (query, rows); rows is None for statements run verbatim
+    """
+    for query, rows in groups:
+        if rows is None:
+            yield query, None
+            continue
+
+        for i in range(0, len(rows), batch_rows):
+            yield query, rows[i:i + batch_rows]
+
+
+def _read_plan_cache(cache_path: Path, source_key: List[int]) -> Optional[List[Any]]:
+    """Return the cached plan if it was built from the current source file.
+
+    A missing, unreadable, truncated or stale cache is treated as a miss.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        cached = msgpack.unpackb(data, raw=False) if msgpack else pickle.loads(data)
+        cached_key, plan = cached
+    except (OSError, pickle.UnpicklingError, ValueError, TypeError, EOFError):
+        return None
+    return plan if list(cached_key) == source_key else None
+
+
+def load_import_plan(filepath: Path) -> List[Tuple[str, Optional[List[Any]]]]:
+    """Parse a Cypher file into statement groups, caching the result.
+
+    The parsed groups are stored next to the source file (msgpack if
+    installed, pickle otherwise), keyed by the source's (mtime_ns, size),
+    and written atomically. Unlike streaming, the whole plan is held in
+    memory, so this is opt-in.
+
+    Args:
+        filepath: Path to .cypher file
+
+    Returns:
+        List of (query, rows) tuples as produced by iter_groups()
+    """
+    cache_path = filepath.with_suffix('.cypher.mpk' if msgpack else '.cypher.pkl')
+    st = filepath.stat()
+    source_key = [st.st_mtime_ns, st.st_size]
+
+    plan = _read_plan_cache(cache_path, source_key)
+    if plan is not None:
+        print(f"Loaded parsed import plan: {cache_path}")
+        return plan
+
+    print(f"Reading Cypher file: {filepath}")
+    plan = list(iter_groups(iter_statements(filepath)))
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp.{os.getpid()}")
+    try:
+        if msgpack:
+            tmp_path.write_bytes(msgpack.packb([source_key, plan]))
+        else:
+            tmp_path.write_bytes(pickle.dumps((source_key, plan), protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write import plan cache {cache_path}: {e}")
+    return plan
 
 
 class Neo4jImporter:
-    def __init__(self, uri: str="bolt://localhost:7687", username: str="neo4j", password: str="password"):
+    def __init__(
+        self,
+        uri: str="bolt://localhost:7687",
+        username: str="neo4j",
+        password: str="password",
+        database: Optional[str]=None,
+        config: Optional[GraphRAGConfig]=None,
+    ):
         """Initialize Neo4j connection.
 
         Args:
             uri: Neo4j connection URI (e.g., bolt://localhost:7687)
             username: Neo4j username
             password: Neo4j password
+            database: Target database (server default if None)
+            config: GraphRAG configuration for connection pool settings
+                (loaded from environment if None)
         """
-        self.driver = GraphDatabase.driver(uri, auth=(username, password))
+        config = config or load_config()
+        self.driver = GraphDatabase.driver(
+            uri,
+            auth=(username, password),
+            max_connection_pool_size=config.neo4j_max_pool_size,
+            connection_acquisition_timeout=config.neo4j_acquisition_timeout_seconds,
+            max_connection_lifetime=config.neo4j_max_connection_lifetime_seconds,
+        )
+        self.database = database
 
     def close(self):
         """Close Neo4j connection."""
         self.driver.close()
 
+    def get_server_version(self) -> Tuple[int, ...]:
+        """Get the Neo4j kernel version.
+
+        Returns:
+            Version as a tuple of ints, e.g. (5, 21, 0)
+        """
+        with self.driver.session(database=self.database) as session:
+            record = session.run(
+                "CALL dbms.components() YIELD name, versions "
+                "WHERE name = 'Neo4j Kernel' RETURN versions[0] AS version"
+            ).single()
+
+        if not record:
+            return (0,)
+        return tuple(int(part) for part in re.findall(r'\d+', record['version']))
+
     def clear_database(self):
         """Clear all nodes, relationships, constraints and indexes from database."""
         print("Clearing database...")
-        with self.driver.session() as session:
-            # Drop all constraints
-            print("Dropping constraints...")
-            result = session.run("SHOW CONSTRAINTS")
-            for record in result:
-                constraint_name = record.get('name')
-                if constraint_name:
-                    try:
-                        session.run(f"DROP CONSTRAINT {constraint_name}")
-                    except Exception as e:
-                        print(f"Warning: Could not drop constraint {constraint_name}: {e}")
-
-            # Drop all indexes
-            print("Dropping indexes...")
-            result = session.run("SHOW INDEXES")
-            for record in result:
-                index_name = record.get('name')
-                if index_name and not index_name.startswith('constraint_'):
-                    try:
-                        session.run(f"DROP INDEX {index_name}")
-                    except Exception as e:
-                        print(f"Warning: Could not drop index {index_name}: {e}")
+        with self.driver.session(database=self.database) as session:
+            constraint_names = session.run("SHOW CONSTRAINTS YIELD name").value()
+            # Constraint-backed indexes go away with their constraint
+            index_names = session.run(
+                "SHOW INDEXES YIELD name, owningConstraint "
+                "WHERE owningConstraint IS NULL RETURN name"
+            ).value()
+
+            # Drop all constraints and indexes in one schema transaction
+            print(f"Dropping {len(constraint_names)} constraints and {len(index_names)} indexes...")
+            try:
+                with session.begin_transaction() as tx:
+                    for constraint_name in constraint_names:
+                        tx.run(f"DROP CONSTRAINT `{constraint_name}` IF EXISTS")
+                    for index_name in index_names:
+                        tx.run(f"DROP INDEX `{index_name}` IF EXISTS")
+                    tx.commit()
+            except Exception as e:
+                print(f"Warning: Could not drop constraints/indexes: {e}")
 
             # Delete all nodes and relationships
             print("Deleting all nodes and relationships...")
-            session.run("MATCH (n) DETACH DELETE n")
+            session.run("MATCH (n) DETACH DELETE n").consume()
 
         print("Database cleared successfully")
 
-    def execute_cypher_file(self, filepath: str):
+    def create_schema(self, labels_with_id_keys: Dict[str, Set[str]]):
+        """Create uniqueness constraints for node lookup keys.
+
+        Run before loading data so relationship MATCHes use index seeks
+        instead of label scans.
+
+        Args:
+            labels_with_id_keys: Dictionary mapping label to lookup keys
+        """
+        print("Creating schema constraints...")
+        with self.driver.session(database=self.database) as session:
+            for label, keys in sorted(labels_with_id_keys.items()):
+                for key in sorted(keys):
+                    constraint_name = f"{label.lower()}_{key}"
+                    session.run(
+                        f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS "
+                        f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+                    ).consume()
+                    print(f"  {constraint_name}: (:{label}).{key}")
+
+    def execute_cypher_file(
+        self,
+        filepath: str,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        plan: Optional[List[Tuple[str, Optional[List[Any]]]]] = None,
+    ):
         """Execute Cypher statements from file.
 
+        UNWIND statements with literal row lists are sent as parameterized
+        batches, so each statement shape is parsed and planned only once.
+        On servers that support it, all rows of a statement shape are sent
+        in one message and the server commits them in inner transactions of
+        batch_rows rows; node statements run those concurrently on Neo4j
+        5.21+, relationship statements one at a time. Statements
+        still execute in file order, so relationships are only created once
+        all nodes exist.
+
         Args:
             filepath: Path to .cypher file
+            batch_rows: Maximum rows per transaction
+            concurrency: Inner transactions to run in parallel for node
+                statements (Neo4j 5.21+)
+            plan: Statement groups already loaded with load_import_plan();
+                the file is streamed and parsed when omitted
         """
         filepath = Path(filepath)
         if not filepath.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
 
-        print(f"Reading Cypher file: {filepath}")
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Remove comments
-        lines = []
-        for line in content.split('\n'):
-            if not line.strip().startswith('//'):
-                lines.append(line)
-
-        cypher_content = '\n'.join(lines)
-
-        # Split by semicolons to get individual statements
-        # This is a simple split that works for our generated file
-        statements = [stmt.strip() for stmt in cypher_content.split(';') if stmt.strip()]
-
-        print(f"Found {len(statements)} Cypher statements")
-        print(f"Executing statements (this may take a while)...")
-
-        # Execute each statement
-        with self.driver.session() as session:
-            for i, statement in enumerate(statements, 1):
+        if plan is not None:
+            groups = plan
+        else:
+            print(f"Reading Cypher file: {filepath}")
+            groups = iter_groups(iter_statements(filepath))
+
+        # Let the server chunk each batch into (concurrent) transactions
+        version = self.get_server_version()
+        server_batched = version >= IN_TRANSACTIONS_VERSION
+        tx_concurrency = None
+        if version >= CONCURRENT_TRANSACTIONS_VERSION and concurrency > 1:
+            tx_concurrency = concurrency
+            print(f"Executing node batches in {concurrency} concurrent transactions of {batch_rows} rows...")
+        elif server_batched:
+            print(f"Executing batches in transactions of {batch_rows} rows...")
+        else:
+            print(f"Executing statements in batches of up to {batch_rows} rows...")
+
+        # The server commits in chunks of batch_rows itself, so each group
+        # goes out as one message; otherwise split groups client-side
+        batches = groups if server_batched else iter_batches(groups, batch_rows)
+
+        # Execute each batch on one session. CALL { ... } IN TRANSACTIONS and
+        # schema statements must run as auto-commit queries; client-side
+        # batches get an explicit transaction that is rolled back on error.
+        i = total_rows = 0
+        last_progress = time.monotonic()
+        with self.driver.session(
+            database=self.database,
+            default_access_mode=WRITE_ACCESS,
+            fetch_size=1000,
+        ) as session:
+            for i, (query, rows) in enumerate(batches, 1):
                 try:
-                    session.run(statement)
-                    if i % 10 == 0:
-                        print(f"Executed {i}/{len(statements)} statements...")
+                    if rows is None:
+                        session.run(query).consume()
+                    elif server_batched:
+                        # Relationship inner transactions lock shared endpoint
+                        # nodes and deadlock when run concurrently, so only
+                        # node groups are spread over concurrent transactions
+                        query = in_transactions(
+                            query, batch_rows,
+                            None if RELATIONSHIP_PATTERN.search(query) else tx_concurrency,
+                        )
+                        session.run(query, rows=rows).consume()
+                    else:
+                        with session.begin_transaction() as tx:
+                            tx.run(query, rows=rows).consume()
+                            tx.commit()
+                    total_rows += len(rows or ())
+                    now = time.monotonic()
+                    if now - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                        print(f"Executed {i} batches ({total_rows} rows)...", flush=True)
+                        last_progress = now
                 except Exception as e:
-                    print(f"Error executing statement {i}:")
-                    print(f"Statement preview: {statement[:200]}...")
+                    # Later relationship MATCHes depend on earlier node
+                    # batches, so stop rather than import a partial graph
+                    print(f"Error executing batch {i}:")
+                    print(f"Statement preview: {query[:200]}...")
                     print(f"Error: {e}")
-                    raise
+                    if server_batched and rows is not None:
+                        detail = "its completed inner transactions stay committed"
+                    else:
+                        detail = "it was rolled back"
+                    raise RuntimeError(
+                        f"Import aborted at batch {i} ({detail}); "
+                        f"the {i - 1} earlier batches stay committed"
+                    ) from e
 
-        print("Import completed successfully!")
+        print(f"Import completed successfully! ({i} batches, {total_rows} rows)")
 
     def verify_import(self):
         """Verify import by counting nodes and relationships."""
         print("\nVerifying import...")
 
-        with self.driver.session() as session:
-            # Count nodes by type
-            result = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] as label, count(*) as count
+        # Count nodes and relationships by type in one round-trip; the result
+        # is small, so pull all records at once (fetch_size=-1)
+        with self.driver.session(database=self.database, fetch_size=-1) as session:
+            records = session.run("""
+                CALL {
+                    MATCH (n)
+                    RETURN 'node' as kind, labels(n)[0] as name, count(*) as count
+                    UNION ALL
+                    MATCH ()-[r]->()
+                    RETURN 'relationship' as kind, type(r) as name, count(*) as count
+                }
+                RETURN kind, name, count
                 ORDER BY count DESC
-            """)
+            """).data()
 
-            print("\nNodes by type:")
-            total_nodes = 0
-            for record in result:
-                print(f"  {record['label']}: {record['count']}")
+        print("\nNodes by type:")
+        total_nodes = 0
+        for record in records:
+            if record['kind'] == 'node':
+                print(f"  {record['name']}: {record['count']}")
                 total_nodes += record['count']
-            print(f"  Total nodes: {total_nodes}")
+        print(f"  Total nodes: {total_nodes}")
 
-            # Count relationships by type
-            result = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) as type, count(*) as count
-                ORDER BY count DESC
-            """)
-
-            print("\nRelationships by type:")
-            total_rels = 0
-            for record in result:
-                print(f"  {record['type']}: {record['count']}")
+        print("\nRelationships by type:")
+        total_rels = 0
+        for record in records:
+            if record['kind'] == 'relationship':
+                print(f"  {record['name']}: {record['count']}")
                 total_rels += record['count']
-            print(f"  Total relationships: {total_rels}")
+        print(f"  Total relationships: {total_rels}")
 
 
 def main():
@@ -138,14 +554,18 @@ def main():
     parser.add_argument('--uri', default='bolt://localhost:7687', help='Neo4j URI')
     parser.add_argument('--username', default='neo4j', help='Neo4j username')
     parser.add_argument('--password', default='password', help='Neo4j password')
+    parser.add_argument('--database', default=None, help='Neo4j database (server default if omitted)')
     parser.add_argument('--file', default='output/phase6/neo4j_import.cypher', help='Cypher file to import')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per transaction')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Concurrent transactions per node batch (Neo4j 5.21+)')
+    parser.add_argument('--plan-cache', action='store_true', help='Load the whole parsed plan into memory and cache it next to the file')
     parser.add_argument('--clear', action='store_true', help='Clear database before import')
     parser.add_argument('--no-verify', action='store_true', help='Skip verification after import')
 
     args = parser.parse_args()
 
     # Create importer
-    importer = Neo4jImporter(args.uri, args.username, args.password)
+    importer = Neo4jImporter(args.uri, args.username, args.password, args.database)
 
     try:
         # Optional: Clear existing data
@@ -153,8 +573,17 @@ def main():
             print("WARNING: Clearing all existing data in the Neo4j database!")
             importer.clear_database()
 
+        # Create lookup constraints before loading data; a loaded plan
+        # already holds every query, so don't scan the file again
+        plan = None
+        if args.plan_cache:
+            plan = load_import_plan(Path(args.file))
+            importer.create_schema(plan_lookup_keys(plan))
+        else:
+            importer.create_schema(find_lookup_keys(args.file))
+
         # Execute import
-        importer.execute_cypher_file(args.file)
+        importer.execute_cypher_file(args.file, args.batch_rows, args.concurrency, plan=plan)
 
         # Verify
         if not args.no_verify:
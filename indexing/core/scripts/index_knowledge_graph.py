@@ -25,8 +25,14 @@ from typing import Optional, List
 
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
 from graph_builder import GraphIndexer
 from config import validate_config, LOG_FILE, LOG_LEVEL
+from graphrag_config import load_config
 
 # Load environment variables
 load_dotenv()
@@ -89,7 +95,7 @@ def print_summary(result: dict) -> None:
 
         print(f"\n✓ Success!")
         print(f"\n  Conditions Processed: {stats.get('conditions_processed', 0)}")
-        print(f"  Episodes Created:     {stats.get('episodes_created', 0)}")
+        print(f"  Entities Merged:      {stats.get('entities_merged', 0)}")
         print(f"  Errors:               {stats.get('errors', 0)}")
         print(f"  Duration:             {duration:.1f}s ({duration/60:.1f}m)")
 
@@ -117,6 +123,7 @@ async def dry_run(data_path: str, chapters: Optional[List[str]] = None) -> None:
 
     parser = WillsEyeParser(data_path)
     all_chapters = parser.get_chapters()
+    all_chapters_set = set(all_chapters)
 
     # Filter chapters if specified
     chapters_to_process = chapters if chapters else all_chapters
@@ -130,7 +137,7 @@ async def dry_run(data_path: str, chapters: Optional[List[str]] = None) -> None:
     total_conditions = 0
 
     for chapter_name in chapters_to_process:
-        if chapter_name not in all_chapters:
+        if chapter_name not in all_chapters_set:
             logger.warning(f"Chapter '{chapter_name}' not found, skipping")
             continue
 
@@ -186,25 +193,33 @@ async def index_chapters(
         if chapters:
             logger.info(f"Indexing {len(chapters)} specified chapter(s)")
 
-            # Index each chapter
+            # Index chapters concurrently, bounded by max_concurrent_requests
+            semaphore = asyncio.Semaphore(load_config().max_concurrent_requests)
+
+            async def index_one(chapter: str) -> dict:
+                async with semaphore:
+                    logger.info(f"Indexing chapter: {chapter}")
+                    return await indexer.index_chapter(chapter, batch_size)
+
+            results = await asyncio.gather(
+                *(index_one(chapter) for chapter in chapters),
+                return_exceptions=True,
+            )
+
+            # The builder accumulates stats across chapters, so read them once
+            builder_stats = indexer.builder.stats
             all_stats = {
-                "conditions_processed": 0,
-                "episodes_created": 0,
-                "errors": 0,
+                "conditions_processed": builder_stats["conditions_processed"],
+                "entities_merged": builder_stats["entities_merged"],
+                "errors": builder_stats["errors"],
             }
 
-            for chapter in chapters:
-                logger.info(f"Indexing chapter: {chapter}")
-                result = await indexer.index_chapter(chapter, batch_size)
-
-                if result.get("success"):
-                    chapter_stats = result.get("stats", {})
-                    all_stats["conditions_processed"] += chapter_stats.get("conditions_processed", 0)
-                    all_stats["episodes_created"] += chapter_stats.get("episodes_created", 0)
-                    all_stats["errors"] += chapter_stats.get("errors", 0)
-                else:
-                    logger.error(f"Failed to index chapter {chapter}: {result.get('error')}")
+            for chapter, chapter_result in zip(chapters, results):
+                if isinstance(chapter_result, Exception):
+                    logger.error(f"Failed to index chapter {chapter}: {chapter_result}")
                     all_stats["errors"] += 1
+                elif not chapter_result.get("success"):
+                    logger.error(f"Failed to index chapter {chapter}: {chapter_result.get('error')}")
 
             result = {
                 "success": True,
@@ -241,7 +256,54 @@ async def index_chapters(
         }
 
     finally:
-        indexer.close()
+        await indexer.aclose()
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to compact JSON, using orjson when available.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def save_results(result: dict, timestamp: str) -> None:
+    """Save indexing results as a compact summary plus validation details.
+
+    The summary goes to indexing_results_<timestamp>.json; per-query
+    validations, if any, are written one per line to
+    indexing_validations_<timestamp>.ndjson.
+
+    Args:
+        result: Indexing result dictionary
+        timestamp: Timestamp used in the output file names
+    """
+    logger = logging.getLogger(__name__)
+
+    summary = dict(result)
+    validation = result.get("validation")
+    validations = []
+    if validation:
+        validations = validation.get("validations", [])
+        summary["validation"] = {k: v for k, v in validation.items() if k != "validations"}
+
+    results_file = f"indexing_results_{timestamp}.json"
+    Path(results_file).write_bytes(_dumps(summary))
+    logger.info(f"Detailed results saved to: {results_file}")
+
+    if validations:
+        validations_file = f"indexing_validations_{timestamp}.ndjson"
+        with open(validations_file, 'wb') as f:
+            for v in validations:
+                f.write(_dumps(v))
+                f.write(b"\n")
+        logger.info(f"Validation details saved to: {validations_file}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -366,10 +428,7 @@ async def main() -> int:
             print_summary(result)
 
             # Save detailed results
-            results_file = f"indexing_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(results_file, 'w') as f:
-                json.dump(result, f, indent=2)
-            logger.info(f"Detailed results saved to: {results_file}")
+            save_results(result, datetime.now().strftime('%Y%m%d_%H%M%S'))
 
             return 0 if result.get("success") else 1
 
@@ -24,70 +24,179 @@ Usage:
     python configure_extraction.py --validate
 """
 
+import hashlib
 import json
+import os
+import pickle
+import sys
 import argparse
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Set
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
 
 CONFIG_FILE = Path(__file__).parent / "extraction_config.json"
+CONFIG_CACHE_FILE = CONFIG_FILE.with_suffix(".cache.pkl")
 OUTPUT_DIR = Path(__file__).parent
+# Plain-string prefix for per-file paths; avoids building a Path per entry
+OUTPUT_DIR_STR = str(OUTPUT_DIR)
+
+# Below this many active files in a directory, stat them instead of scandir
+SCANDIR_MIN_FILES = 8
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file via a temp file and os.replace so readers never see a partial write."""
+    tmp_file = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    tmp_file.write_bytes(data)
+    os.replace(tmp_file, path)
+
+
+@lru_cache(maxsize=4)
+def _load_config_pickled(mtime_ns: int, size: int) -> bytes:
+    """Load the config as pickled bytes, using the on-disk cache if current.
+
+    Keyed by the config file's (mtime_ns, size) so edits invalidate it.
+    """
+    cache_key = (mtime_ns, size)
+    try:
+        cached_key, data = pickle.loads(CONFIG_CACHE_FILE.read_bytes())
+        if cached_key == cache_key:
+            return data
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    if orjson is not None:
+        config = orjson.loads(CONFIG_FILE.read_bytes())
+    else:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    data = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+
+    try:
+        _atomic_write_bytes(
+            CONFIG_CACHE_FILE, pickle.dumps((cache_key, data), protocol=pickle.HIGHEST_PROTOCOL)
+        )
+    except OSError:
+        pass
+
+    return data
 
 
 def load_config() -> Dict:
     """Load extraction configuration."""
-    if not CONFIG_FILE.exists():
+    try:
+        st = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
         print(f"❌ Config file not found: {CONFIG_FILE}")
         return {}
 
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Unpickle a fresh copy each call, since callers modify the config
+    return pickle.loads(_load_config_pickled(st.st_mtime_ns, st.st_size))
 
 
 def save_config(config: Dict):
     """Save extraction configuration."""
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
+    _atomic_write_bytes(CONFIG_FILE, json.dumps(config, indent=2).encode("utf-8"))
     print(f"✓ Configuration saved to {CONFIG_FILE}")
 
 
+class ActiveSource(NamedTuple):
+    """A configured entity/edge source and the file for its active mode."""
+    section: str
+    name: str
+    mode: str
+    file: str
+
+
+def active_sources(config: Dict) -> List[ActiveSource]:
+    """List every entity/edge source that has a file for its active mode."""
+    sources = []
+    for section in ("entity_sources", "edge_sources"):
+        for name, source_config in config.get(section, {}).items():
+            active_mode = source_config.get("active_mode", "baseline")
+            active_file = source_config.get(active_mode)
+            if active_file:
+                sources.append(ActiveSource(section, name, active_mode, active_file))
+    return sources
+
+
+def scan_present_files(config: Dict) -> Set[str]:
+    """Find which active source files exist with as few syscalls as possible.
+
+    Directories holding many active files are listed once with scandir;
+    for just a few files, stat-ing them directly is cheaper than listing
+    the whole directory.
+
+    Returns:
+        Set of existing files, as paths relative to OUTPUT_DIR
+    """
+    files_by_directory: Dict[str, Set[str]] = {}
+    for source in active_sources(config):
+        files_by_directory.setdefault(os.path.dirname(source.file), set()).add(source.file)
+
+    present = set()
+    for directory, files in files_by_directory.items():
+        if len(files) < SCANDIR_MIN_FILES:
+            present.update(f for f in files if os.path.isfile(OUTPUT_DIR_STR + os.sep + f))
+            continue
+
+        try:
+            with os.scandir(OUTPUT_DIR_STR + os.sep + directory) as entries:
+                present.update(
+                    os.path.join(directory, entry.name) for entry in entries if entry.is_file()
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+    return present
+
+
 def show_config(config: Dict):
     """Display current configuration."""
-    print("=" * 80)
-    print("EXTRACTION CONFIGURATION")
-    print("=" * 80)
-    print(f"Default Mode: {config.get('default_mode', 'baseline')}")
+    out = []  # written to stdout in one call
+    present = scan_present_files(config)
+
+    out.append("=" * 80)
+    out.append("EXTRACTION CONFIGURATION")
+    out.append("=" * 80)
+    out.append(f"Default Mode: {config.get('default_mode', 'baseline')}")
 
-    print("\n📦 ENTITY SOURCES:")
-    print("-" * 80)
+    out.append("\n📦 ENTITY SOURCES:")
+    out.append("-" * 80)
     for entity_name, entity_config in config.get("entity_sources", {}).items():
         active_mode = entity_config.get("active_mode", "baseline")
         active_file = entity_config.get(active_mode, "N/A")
 
         # Check if file exists
-        file_path = OUTPUT_DIR / active_file if active_file != "N/A" else None
-        exists = "✓" if file_path and file_path.exists() else "✗"
+        exists = "✓" if active_file in present else "✗"
 
-        print(f"  {entity_name:20s} [{active_mode:8s}] {exists} {active_file}")
+        out.append(f"  {entity_name:20s} [{active_mode:8s}] {exists} {active_file}")
 
         if entity_config.get("note"):
-            print(f"    ℹ {entity_config['note']}")
+            out.append(f"    ℹ {entity_config['note']}")
 
-    print("\n🔗 EDGE SOURCES:")
-    print("-" * 80)
+    out.append("\n🔗 EDGE SOURCES:")
+    out.append("-" * 80)
     for edge_name, edge_config in config.get("edge_sources", {}).items():
         active_mode = edge_config.get("active_mode", "baseline")
         active_file = edge_config.get(active_mode, "N/A")
 
         # Check if file exists
-        file_path = OUTPUT_DIR / active_file if active_file != "N/A" else None
-        exists = "✓" if file_path and file_path.exists() else "✗"
+        exists = "✓" if active_file in present else "✗"
 
-        print(f"  {edge_name:20s} [{active_mode:8s}] {exists} {active_file}")
+        out.append(f"  {edge_name:20s} [{active_mode:8s}] {exists} {active_file}")
 
         if edge_config.get("note"):
-            print(f"    ℹ {edge_config['note']}")
+            out.append(f"    ℹ {edge_config['note']}")
 
-    print("=" * 80)
+    out.append("=" * 80)
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def set_mode(config: Dict, mode: str, entity_type: str = "all"):
@@ -156,108 +265,137 @@ def set_edges_mode(config: Dict, mode: str):
     return True
 
 
-def resolve_paths(config: Dict):
-    """Resolve active file paths for all entities and edges."""
-    print("=" * 80)
-    print("RESOLVED FILE PATHS")
-    print("=" * 80)
+def config_hash(config: Dict) -> str:
+    """Hash the config contents together with the output directory."""
+    if orjson is not None:
+        data = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+    else:
+        data = json.dumps(config, sort_keys=True).encode("utf-8")
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(OUTPUT_DIR_STR.encode("utf-8"))
+    return digest.hexdigest()
 
-    resolved = {
-        "entities": {},
-        "edges": {}
-    }
 
-    print("\n📦 ENTITIES:")
-    for entity_name, entity_config in config.get("entity_sources", {}).items():
-        active_mode = entity_config.get("active_mode", "baseline")
-        active_file = entity_config.get(active_mode)
+def _load_resolved(resolved_file: Path) -> Optional[Dict]:
+    """Read a previously saved resolved_paths.json, or None if unusable."""
+    try:
+        data = resolved_file.read_bytes()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except (OSError, ValueError):
+        return None
 
-        if active_file:
-            full_path = OUTPUT_DIR / active_file
-            resolved["entities"][entity_name] = str(full_path)
-            print(f"  {entity_name:20s} → {full_path}")
 
-    print("\n🔗 EDGES:")
-    for edge_name, edge_config in config.get("edge_sources", {}).items():
-        active_mode = edge_config.get("active_mode", "baseline")
-        active_file = edge_config.get(active_mode)
+def resolve_paths(config: Dict):
+    """Resolve active file paths for all entities and edges.
 
-        if active_file:
-            full_path = OUTPUT_DIR / active_file
-            resolved["edges"][edge_name] = str(full_path)
-            print(f"  {edge_name:20s} → {full_path}")
+    Skips the rebuild when resolved_paths.json was written from an
+    identical config (matching "_cfg_hash").
+    """
+    out = []  # written to stdout in one call
+    out.append("=" * 80)
+    out.append("RESOLVED FILE PATHS")
+    out.append("=" * 80)
 
-    # Save resolved paths
     resolved_file = OUTPUT_DIR / "resolved_paths.json"
-    with open(resolved_file, "w", encoding="utf-8") as f:
-        json.dump(resolved, f, indent=2)
+    cfg_hash = config_hash(config)
+    cached = _load_resolved(resolved_file)
+    up_to_date = isinstance(cached, dict) and cached.get("_cfg_hash") == cfg_hash
+
+    if up_to_date:
+        resolved = cached
+    else:
+        resolved = {
+            "entities": {},
+            "edges": {}
+        }
+        for source in active_sources(config):
+            section = "entities" if source.section == "entity_sources" else "edges"
+            resolved[section][source.name] = OUTPUT_DIR_STR + os.sep + source.file
+        resolved["_cfg_hash"] = cfg_hash
+
+    out.append("\n📦 ENTITIES:")
+    for entity_name, full_path in resolved["entities"].items():
+        out.append(f"  {entity_name:20s} → {full_path}")
+
+    out.append("\n🔗 EDGES:")
+    for edge_name, full_path in resolved["edges"].items():
+        out.append(f"  {edge_name:20s} → {full_path}")
+
+    if up_to_date:
+        out.append(f"\n✓ Resolved paths unchanged in {resolved_file}")
+    else:
+        # Save resolved paths
+        if orjson is not None:
+            data = orjson.dumps(resolved, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(resolved, indent=2).encode("utf-8")
+        _atomic_write_bytes(resolved_file, data)
+        out.append(f"\n✓ Saved resolved paths to {resolved_file}")
+    out.append("=" * 80)
 
-    print(f"\n✓ Saved resolved paths to {resolved_file}")
-    print("=" * 80)
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def validate_config(config: Dict):
     """Validate that configured files exist."""
-    print("=" * 80)
-    print("VALIDATION REPORT")
-    print("=" * 80)
+    out = []  # written to stdout in one call
+    present = scan_present_files(config)
 
-    missing_entities = []
-    missing_edges = []
+    out.append("=" * 80)
+    out.append("VALIDATION REPORT")
+    out.append("=" * 80)
 
-    print("\n📦 ENTITIES:")
-    for entity_name, entity_config in config.get("entity_sources", {}).items():
-        active_mode = entity_config.get("active_mode", "baseline")
-        active_file = entity_config.get(active_mode)
-
-        if active_file:
-            file_path = OUTPUT_DIR / active_file
-            exists = file_path.exists()
-            status = "✓" if exists else "✗"
-            print(f"  {status} {entity_name:20s} [{active_mode:8s}] {active_file}")
-
-            if not exists:
-                missing_entities.append((entity_name, active_file))
-
-    print("\n🔗 EDGES:")
-    for edge_name, edge_config in config.get("edge_sources", {}).items():
-        active_mode = edge_config.get("active_mode", "baseline")
-        active_file = edge_config.get(active_mode)
+    sources = active_sources(config)
+    missing = [source for source in sources if source.file not in present]
+    missing_entities = [(m.name, m.file) for m in missing if m.section == "entity_sources"]
+    missing_edges = [(m.name, m.file) for m in missing if m.section == "edge_sources"]
 
-        if active_file:
-            file_path = OUTPUT_DIR / active_file
-            exists = file_path.exists()
-            status = "✓" if exists else "✗"
-            print(f"  {status} {edge_name:20s} [{active_mode:8s}] {active_file}")
-
-            if not exists:
-                missing_edges.append((edge_name, active_file))
+    for section, heading in (("entity_sources", "\n📦 ENTITIES:"), ("edge_sources", "\n🔗 EDGES:")):
+        out.append(heading)
+        out.extend(
+            f"  {'✓' if source.file in present else '✗'} {source.name:20s} [{source.mode:8s}] {source.file}"
+            for source in sources if source.section == section
+        )
 
     # Summary
-    print("\n" + "=" * 80)
+    out.append("\n" + "=" * 80)
     if missing_entities or missing_edges:
-        print("⚠ VALIDATION FAILED")
-        print(f"  Missing entities: {len(missing_entities)}")
-        print(f"  Missing edges: {len(missing_edges)}")
+        out.append("⚠ VALIDATION FAILED")
+        out.append(f"  Missing entities: {len(missing_entities)}")
+        out.append(f"  Missing edges: {len(missing_edges)}")
 
         if missing_entities:
-            print("\n  Missing entity files:")
+            out.append("\n  Missing entity files:")
             for entity_name, file_path in missing_entities:
-                print(f"    • {entity_name}: {file_path}")
+                out.append(f"    • {entity_name}: {file_path}")
 
         if missing_edges:
-            print("\n  Missing edge files:")
+            out.append("\n  Missing edge files:")
             for edge_name, file_path in missing_edges:
-                print(f"    • {edge_name}: {file_path}")
+                out.append(f"    • {edge_name}: {file_path}")
 
-        print("\n  💡 Run compensation scripts to generate missing files.")
+        out.append("\n  💡 Run compensation scripts to generate missing files.")
     else:
-        print("✓ VALIDATION PASSED - All configured files exist")
+        out.append("✓ VALIDATION PASSED - All configured files exist")
 
-    print("=" * 80)
+    out.append("=" * 80)
 
+    sys.stdout.write("\n".join(out) + "\n")
 
-def main():
+
+# Single-flag commands that need no argument parsing; no flag means --show
+FAST_COMMANDS = {
+    "--show": show_config,
+    "--resolve": resolve_paths,
+    "--validate": validate_config,
+}
+
+
+_PARSER: Optional[argparse.ArgumentParser] = None
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
     parser = argparse.ArgumentParser(
         description="Manage extraction configuration for baseline vs LLM outputs"
     )
@@ -268,8 +406,26 @@ def main():
     parser.add_argument("--set", nargs="+", metavar="ENTITY=MODE", help="Set specific entity/edge mode (e.g., anatomy=llm)")
     parser.add_argument("--resolve", action="store_true", help="Resolve and save active file paths")
     parser.add_argument("--validate", action="store_true", help="Validate that configured files exist")
+    return parser
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """Return the module parser, building it on first use."""
+    global _PARSER
+    _PARSER = _PARSER or _build_parser()
+    return _PARSER
+
+
+def main():
+    # Fast path: dispatch plain commands without building the argparse parser
+    argv = sys.argv[1:] or ["--show"]
+    if len(argv) == 1 and argv[0] in FAST_COMMANDS:
+        config = load_config()
+        if config:
+            FAST_COMMANDS[argv[0]](config)
+        return
 
-    args = parser.parse_args()
+    args = _get_parser().parse_args(argv)
 
     # Load config
     config = load_config()
@@ -293,11 +449,11 @@ def main():
     elif args.set:
         changes_made = False
         for setting in args.set:
-            if "=" not in setting:
+            entity_type, sep, mode = setting.partition("=")
+            if not sep:
                 print(f"❌ Invalid format: {setting}. Use ENTITY=MODE")
                 continue
 
-            entity_type, mode = setting.split("=", 1)
             if set_mode(config, mode, entity_type):
                 changes_made = True
 
@@ -8,12 +8,112 @@ This module provides common functionality for:
 - Structured error reporting
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional
-from datetime import datetime
-import jsonschema
+from typing import Any, BinaryIO, Dict, List, Tuple, Optional
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+try:
+    import fastjsonschema
+except ImportError:  # optional, falls back to jsonschema
+    fastjsonschema = None
+
+# Compiled validators keyed by id(schema); the schema is stored alongside so
+# its id can't be reused by another object while cached
+_VALIDATOR_CACHE: Dict[int, Tuple[Dict[str, Any], Any]] = {}
+
+# Sentinel for keys absent from a parsed response (None is a valid value)
+_MISSING = object()
+
+
+# (epoch second, ISO-formatted local time for that second)
+_ISO_SECOND: Tuple[int, str] = (-1, "")
+
+
+def _now_iso() -> str:
+    """Current local time in ISO format with microseconds.
+
+    The date/time part is formatted once per second and reused; datetime
+    is imported on first use.
+    """
+    global _ISO_SECOND
+    sec, us = divmod(time.time_ns() // 1000, 1_000_000)
+    if _ISO_SECOND[0] != sec:
+        from datetime import datetime
+        _ISO_SECOND = (sec, datetime.fromtimestamp(sec).isoformat())
+    return f"{_ISO_SECOND[1]}.{us:06d}"
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file via a temp file and os.replace so readers never see a partial write."""
+    path = Path(path)
+    tmp_file = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    tmp_file.write_bytes(data)
+    os.replace(tmp_file, path)
+
+
+def dump_json(path: Path, obj: Any) -> None:
+    """
+    Write an object as indented UTF-8 JSON, using orjson when available.
+
+    The file is replaced atomically.
+
+    Args:
+        path: File to write
+        obj: JSON-serializable object
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    _atomic_write_bytes(path, data)
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serialize an object as one compact UTF-8 JSON line."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _schema_key(schema: Dict[str, Any]) -> str:
+    """Short content hash identifying a schema."""
+    if orjson is not None:
+        data = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(schema, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def ndjson_to_json_array(ndjson_path: Path) -> Path:
+    """
+    Convert an NDJSON error log into a JSON array file next to it.
+
+    Args:
+        ndjson_path: Path to the .ndjson file
+
+    Returns:
+        Path to the written .json file
+    """
+    ndjson_path = Path(ndjson_path)
+    with open(ndjson_path, "rb") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    json_path = ndjson_path.with_suffix(".json")
+    dump_json(json_path, records)
+    return json_path
 
 
 class SchemaValidationError(Exception):
@@ -37,24 +137,50 @@ class InvalidResponseHandler:
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
         # Create filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.invalid_file = self.output_dir / f"invalid_{entity_type}_{timestamp}.json"
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        # Records are appended as NDJSON when recorded, so only the summary
+        # is kept in memory
+        self.invalid_file = self.output_dir / f"invalid_{entity_type}_{timestamp}.ndjson"
         self.summary_file = self.output_dir / f"invalid_{entity_type}_summary.json"
-        self.connection_errors_file = self.output_dir / f"connection_errors_{entity_type}_{timestamp}.json"
+        self.connection_errors_file = self.output_dir / f"connection_errors_{entity_type}_{timestamp}.ndjson"
+
+        # Extraction scripts record from worker threads
+        self._lock = threading.Lock()
+        self._open_files: Dict[Path, BinaryIO] = {}
 
-        self.invalid_responses = []
-        self.connection_errors = []
+        # Expected schemas are stored once in the summary and referenced by
+        # hash from each record; keyed by id() to skip re-hashing
+        self._schema_registry: Dict[str, Dict[str, Any]] = {}
+        self._schema_keys: Dict[int, Tuple[Dict[str, Any], str]] = {}
         self.summary = {
             "entity_type": entity_type,
             "timestamp": timestamp,
             "total_invalid": 0,
             "total_connection_errors": 0,
-            "errors_by_type": {},
-            "connection_errors_by_type": {},
+            "errors_by_type": Counter(),
+            "connection_errors_by_type": Counter(),
             "file_path": str(self.invalid_file),
             "connection_errors_file_path": str(self.connection_errors_file)
         }
 
+    def _append(self, path: Path, record: Dict[str, Any]) -> None:
+        """Append a record to an NDJSON file, opening it on first use (lock held)."""
+        fh = self._open_files.get(path)
+        if fh is None:
+            fh = self._open_files[path] = open(path, "ab", buffering=1 << 20)
+        fh.write(_dumps_line(record))
+
+    def _schema_ref(self, schema: Dict[str, Any]) -> str:
+        """Register a schema and return its reference key (lock held)."""
+        cached = self._schema_keys.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+
+        key = _schema_key(schema)
+        self._schema_registry.setdefault(key, schema)
+        self._schema_keys[id(schema)] = (schema, key)
+        return key
+
     def record_invalid_response(
         self,
         text_block: Dict[str, Any],
@@ -74,7 +200,7 @@ class InvalidResponseHandler:
             schema: The expected JSON schema
         """
         record = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "chapter": text_block.get("chapter_number"),
             "section": text_block.get("section_title"),
             "text_block_id": text_block.get("id"),
@@ -83,17 +209,18 @@ class InvalidResponseHandler:
             "llm_response": llm_response,
             "error": error,
             "error_category": "schema_validation",
-            "expected_schema": schema,
+            "expected_schema_ref": None,
             "entity_type": self.entity_type
         }
 
-        self.invalid_responses.append(record)
+        error_type = error.partition(":")[0]
+        with self._lock:
+            record["expected_schema_ref"] = self._schema_ref(schema)
+            self._append(self.invalid_file, record)
 
-        # Update summary
-        error_type = error.split(":")[0] if ":" in error else error
-        self.summary["errors_by_type"][error_type] = \
-            self.summary["errors_by_type"].get(error_type, 0) + 1
-        self.summary["total_invalid"] += 1
+            # Update summary
+            self.summary["errors_by_type"][error_type] += 1
+            self.summary["total_invalid"] += 1
 
     def record_connection_error(
         self,
@@ -115,7 +242,7 @@ class InvalidResponseHandler:
         """
         error_type = type(error).__name__
         record = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "chapter": text_block.get("chapter_number"),
             "section": text_block.get("section_title"),
             "text_block_id": text_block.get("id"),
@@ -130,43 +257,40 @@ class InvalidResponseHandler:
             "action_needed": "Retry the extraction for this text block"
         }
 
-        self.connection_errors.append(record)
+        with self._lock:
+            self._append(self.connection_errors_file, record)
 
-        # Update summary
-        self.summary["connection_errors_by_type"][error_type] = \
-            self.summary["connection_errors_by_type"].get(error_type, 0) + 1
-        self.summary["total_connection_errors"] += 1
+            # Update summary
+            self.summary["connection_errors_by_type"][error_type] += 1
+            self.summary["total_connection_errors"] += 1
 
     def save_invalid_responses(self) -> Tuple[int, str]:
         """
-        Save all invalid responses and connection errors to JSON files for manual review.
+        Flush the NDJSON error logs and save the summary for manual review.
+
+        Use ndjson_to_json_array() to get the logs as JSON arrays.
 
         Returns:
             Tuple of (total_error_count, summary_file_path)
         """
-        saved_count = 0
-        saved_files = []
+        with self._lock:
+            for fh in self._open_files.values():
+                fh.close()
+            self._open_files.clear()
 
-        # Save schema validation failures
-        if self.invalid_responses:
-            with open(self.invalid_file, "w", encoding="utf-8") as f:
-                json.dump(self.invalid_responses, f, indent=2, ensure_ascii=False)
+        saved_files = []
+        if self.summary["total_invalid"]:
             saved_files.append(str(self.invalid_file))
-            saved_count += len(self.invalid_responses)
-
-        # Save connection errors
-        if self.connection_errors:
-            with open(self.connection_errors_file, "w", encoding="utf-8") as f:
-                json.dump(self.connection_errors, f, indent=2, ensure_ascii=False)
+        if self.summary["total_connection_errors"]:
             saved_files.append(str(self.connection_errors_file))
-            saved_count += len(self.connection_errors)
+        saved_count = self.summary["total_invalid"] + self.summary["total_connection_errors"]
 
         # Save summary
-        if self.invalid_responses or self.connection_errors:
+        if saved_count:
             self.summary["saved_files"] = saved_files
             self.summary["total_errors"] = saved_count
-            with open(self.summary_file, "w", encoding="utf-8") as f:
-                json.dump(self.summary, f, indent=2, ensure_ascii=False)
+            self.summary["schemas"] = self._schema_registry
+            dump_json(self.summary_file, self.summary)
 
         return saved_count, str(self.summary_file)
 
@@ -175,6 +299,57 @@ class InvalidResponseHandler:
         return self.summary
 
 
+def _get_validator(schema: Dict[str, Any]) -> Any:
+    """
+    Get the compiled validator for a schema, compiling it on first use.
+
+    Args:
+        schema: The JSON schema
+
+    Returns:
+        fastjsonschema validation function or jsonschema validator instance
+    """
+    cached = _VALIDATOR_CACHE.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    if fastjsonschema is not None:
+        validator = fastjsonschema.compile(schema)
+    else:
+        import jsonschema  # only needed without fastjsonschema
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+
+    _VALIDATOR_CACHE[id(schema)] = (schema, validator)
+    return validator
+
+
+def _schema_error(instance: Any, schema: Dict[str, Any]) -> Optional[str]:
+    """
+    Validate an instance with the cached validator for its schema.
+
+    Args:
+        instance: Parsed JSON to validate
+        schema: The JSON schema to validate against
+
+    Returns:
+        Error message of the most relevant failure, or None if valid
+    """
+    validator = _get_validator(schema)
+
+    if fastjsonschema is not None:
+        try:
+            validator(instance)
+        except fastjsonschema.JsonSchemaValueException as e:
+            return e.message
+        return None
+
+    import jsonschema
+    error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+    return error.message if error else None
+
+
 class SchemaValidator:
     """Validates JSON responses against expected schemas."""
 
@@ -198,22 +373,22 @@ class SchemaValidator:
         try:
             # Try to parse JSON
             try:
-                parsed = json.loads(response_text)
+                parsed = _json_loads(response_text)
             except json.JSONDecodeError as e:
                 return False, None, f"JSON parsing error: {str(e)}"
 
             # Validate against schema
-            try:
-                jsonschema.validate(instance=parsed, schema=schema)
+            schema_error = _schema_error(parsed, schema)
+            if schema_error is None:
                 return True, parsed, ""
-            except jsonschema.ValidationError as e:
-                error_msg = f"Schema validation error: {e.message}"
-                if not strict:
-                    # In lenient mode, accept if the required fields are present
-                    required_fields = schema.get("required", [])
-                    if all(field in parsed for field in required_fields):
-                        return True, parsed, ""
-                return False, parsed, error_msg
+
+            error_msg = f"Schema validation error: {schema_error}"
+            if not strict:
+                # In lenient mode, accept if the required fields are present
+                required_fields = schema.get("required", [])
+                if all(field in parsed for field in required_fields):
+                    return True, parsed, ""
+            return False, parsed, error_msg
 
         except Exception as e:
             return False, None, f"Unexpected error: {str(e)}"
@@ -235,21 +410,13 @@ class SchemaValidator:
         Returns:
             List of extracted items
         """
-        # Try primary key
-        if primary_key in parsed_json:
-            items = parsed_json[primary_key]
-            if isinstance(items, list):
-                return items
-            return [items] if items else []
-
-        # Try fallback keys
-        if fallback_keys:
-            for key in fallback_keys:
-                if key in parsed_json:
-                    items = parsed_json[key]
-                    if isinstance(items, list):
-                        return items
-                    return [items] if items else []
+        for key in (primary_key, *(fallback_keys or ())):
+            items = parsed_json.get(key, _MISSING)
+            if items is not _MISSING:
+                # Parsed JSON only produces plain lists, so skip isinstance
+                if type(items) is list:
+                    return items
+                return [items] if items else []
 
         # If nothing found, return empty list
         return []
@@ -270,12 +437,13 @@ def create_error_summary_report(
         Path to the report file
     """
     report = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "total_entity_types": len(invalid_handlers),
         "entity_summaries": {},
         "total_invalid_responses": 0,
         "common_error_types": {}
     }
+    error_types = Counter()
 
     for entity_type, handler in invalid_handlers.items():
         summary = handler.get_summary()
@@ -283,19 +451,14 @@ def create_error_summary_report(
         report["total_invalid_responses"] += summary.get("total_invalid", 0)
 
         # Aggregate error types
-        for error_type, count in summary.get("errors_by_type", {}).items():
-            report["common_error_types"][error_type] = \
-                report["common_error_types"].get(error_type, 0) + count
+        error_types.update(summary.get("errors_by_type", {}))
 
     # Sort error types by frequency
-    report["common_error_types"] = dict(
-        sorted(report["common_error_types"].items(), key=lambda x: x[1], reverse=True)
-    )
+    report["common_error_types"] = dict(error_types.most_common())
 
     output_dir.mkdir(parents=True, exist_ok=True)
     report_file = output_dir / "invalid_responses_summary.json"
 
-    with open(report_file, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+    dump_json(report_file, report)
 
     return str(report_file)
@@ -14,6 +14,7 @@ Usage:
     # Load specific entity type
     diseases = loader.load_entities("diseases")
     anatomy = loader.load_entities("anatomy")
+    print(diseases.loaded_from, diseases.config_mode)
 
     # Load all entities
     all_entities = loader.load_all_entities()
@@ -26,11 +27,165 @@ Usage:
 
     # Get statistics
     stats = loader.get_stats()
+
+Set HH_JSON_CACHE=1 to keep pickle sidecars (<name>.cache.pkl) next to the
+data files, so repeat runs skip JSON decoding for unchanged files.
 """
 
 import json
+import mmap
+import os
+import pickle
+import threading
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional, falls back to loading the whole array
+    ijson = None
+
+# Set to "1" to keep a pickle sidecar (<name>.cache.pkl) next to each data
+# file; unpickling is much faster than decoding JSON on repeat runs
+JSON_CACHE_ENV = "HH_JSON_CACHE"
+
+
+def _read_json(path: Path) -> Any:
+    """
+    Read a JSON file, decoding with orjson when available.
+
+    With orjson the file is memory-mapped and parsed in place, so the raw
+    bytes are never copied into a separate buffer.
+    """
+    with open(path, "rb") as f:
+        if orjson is None:
+            return json.loads(f.read())
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file can't be mapped
+            return orjson.loads(f.read())
+
+    with mm:
+        if hasattr(mm, "madvise"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+def _prefetch(paths: Iterable[Path]) -> None:
+    """
+    Ask the kernel to start reading several files at once.
+
+    Issues POSIX_FADV_WILLNEED for each file so their reads are queued
+    together before any decoding starts. No-op where posix_fadvise is
+    unavailable; missing files are skipped.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _read_json_cached(path: Path) -> Any:
+    """
+    Read a data file via its pickle sidecar when HH_JSON_CACHE=1.
+
+    The sidecar is keyed by the JSON file's (mtime_ns, size), rebuilt after
+    any change, and written atomically. Without the env var this is
+    _read_json.
+    """
+    if os.environ.get(JSON_CACHE_ENV) != "1":
+        return _read_json(path)
+
+    st = os.stat(path)
+    cache_key = (st.st_mtime_ns, st.st_size)
+    cache_file = path.with_name(f"{path.stem}.cache.pkl")
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, data = pickle.load(f)
+        if cached_key == cache_key:
+            return data
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    data = _read_json(path)
+    try:
+        # Callers may load from several threads sharing a pid, so the temp name includes the thread
+        tmp_file = cache_file.with_name(f"{cache_file.name}.tmp.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_file, "wb") as f:
+            pickle.dump((cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+    return data
+
+
+def _iter_json_items(path: Path) -> Iterator[Dict]:
+    """
+    Iterate over the records of a top-level JSON array.
+
+    With ijson the array is streamed one record at a time; otherwise, or
+    when the pickle sidecar is enabled, the file is decoded whole.
+    """
+    if ijson is None or os.environ.get(JSON_CACHE_ENV) == "1":
+        yield from _read_json_cached(path)
+        return
+
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+class ProvenancedList(list):
+    """
+    List of loaded records carrying the file and config mode they came from.
+
+    Provenance is stored once on the list instead of in every record's
+    metadata; use entity_provenance() for a per-record view.
+    """
+
+    def __init__(self, records=(), loaded_from: str = "", config_mode: str = ""):
+        super().__init__(records)
+        self.loaded_from = loaded_from
+        self.config_mode = config_mode
+
+
+def entity_provenance(records: ProvenancedList, idx: int) -> Dict:
+    """
+    Get a record's metadata merged with its list's provenance.
+
+    Args:
+        records: List returned by load_entities/load_edges
+        idx: Index of the record
+
+    Returns:
+        Metadata dict including "loaded_from" and "config_mode"
+    """
+    return {
+        **records[idx].get("metadata", {}),
+        "loaded_from": records.loaded_from,
+        "config_mode": records.config_mode,
+    }
+
+
+def _filters_by_type(source_config: Dict) -> bool:
+    """Whether a legacy edge source must be filtered by relationship_type."""
+    return "filter by relationship_type" in source_config.get("note", "")
 
 
 class ConfiguredDataLoader:
@@ -49,14 +204,15 @@ class ConfiguredDataLoader:
         self.config_file = config_file
         self.output_dir = Path(__file__).parent
         self.config = self._load_config()
+        # Loaded records keyed by (kind, name, path, mtime_ns)
+        self._cache: Dict[Tuple[str, str, str, int], List[Dict]] = {}
 
     def _load_config(self) -> Dict:
         """Load configuration file."""
         if not self.config_file.exists():
             raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
 
-        with open(self.config_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _read_json(self.config_file)
 
     def _resolve_file_path(self, relative_path: str) -> Path:
         """Resolve relative path to absolute path."""
@@ -72,7 +228,19 @@ class ConfiguredDataLoader:
 
         return self._resolve_file_path(active_file)
 
-    def load_entities(self, entity_type: str) -> List[Dict]:
+    def _cache_key(self, kind: str, name: str, file_path: Path) -> Tuple[str, str, str, int]:
+        """Build the cache key for a source file, raising if it doesn't exist."""
+        try:
+            mtime_ns = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{kind.capitalize()} file not found: {file_path}") from None
+        return kind, name, str(file_path), mtime_ns
+
+    def invalidate(self):
+        """Drop all cached entities and edges."""
+        self._cache.clear()
+
+    def load_entities(self, entity_type: str) -> ProvenancedList:
         """
         Load entities of a specific type.
 
@@ -80,7 +248,9 @@ class ConfiguredDataLoader:
             entity_type: Entity type name (e.g., "diseases", "anatomy", "etiology")
 
         Returns:
-            List of entity dictionaries
+            ProvenancedList of entity dictionaries; its loaded_from and
+            config_mode attributes record the source. Cached until the file
+            changes, so repeated calls return the same list.
 
         Raises:
             ValueError: If entity type not found in config
@@ -96,20 +266,18 @@ class ConfiguredDataLoader:
         if not file_path:
             raise ValueError(f"No active file configured for entity type: {entity_type}")
 
-        if not file_path.exists():
-            raise FileNotFoundError(f"Entity file not found: {file_path}")
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        key = self._cache_key("entity", entity_type, file_path)
+        if key in self._cache:
+            return self._cache[key]
 
-        # Add source metadata
-        active_mode = entity_sources[entity_type].get("active_mode", "baseline")
-        for entity in data:
-            if "metadata" not in entity:
-                entity["metadata"] = {}
-            entity["metadata"]["loaded_from"] = str(file_path)
-            entity["metadata"]["config_mode"] = active_mode
+        # Attach source metadata to the list, not to each entity
+        data = ProvenancedList(
+            _read_json_cached(file_path),
+            loaded_from=str(file_path),
+            config_mode=entity_sources[entity_type].get("active_mode", "baseline"),
+        )
 
+        self._cache[key] = data
         return data
 
     def load_all_entities(self) -> Dict[str, List[Dict]]:
@@ -119,17 +287,9 @@ class ConfiguredDataLoader:
         Returns:
             Dictionary mapping entity type name to list of entities
         """
-        all_entities = {}
-
-        for entity_type in self.config.get("entity_sources", {}).keys():
-            try:
-                all_entities[entity_type] = self.load_entities(entity_type)
-            except (ValueError, FileNotFoundError) as e:
-                print(f"⚠ Warning: Could not load {entity_type}: {e}")
+        return self._load_all("entity_sources", self.load_entities)
 
-        return all_entities
-
-    def load_edges(self, edge_type: str) -> List[Dict]:
+    def load_edges(self, edge_type: str) -> ProvenancedList:
         """
         Load edges of a specific type.
 
@@ -137,7 +297,9 @@ class ConfiguredDataLoader:
             edge_type: Edge type name (e.g., "caused_by", "affects")
 
         Returns:
-            List of edge dictionaries
+            ProvenancedList of edge dictionaries; its loaded_from and
+            config_mode attributes record the source. Cached until the file
+            changes, so repeated calls return the same list.
 
         Raises:
             ValueError: If edge type not found in config
@@ -153,26 +315,30 @@ class ConfiguredDataLoader:
         if not file_path:
             raise ValueError(f"No active file configured for edge type: {edge_type}")
 
-        if not file_path.exists():
-            raise FileNotFoundError(f"Edge file not found: {file_path}")
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        key = self._cache_key("edge", edge_type, file_path)
+        if key in self._cache:
+            return self._cache[key]
 
         # Handle legacy format (filter by relationship_type if needed)
-        note = edge_sources[edge_type].get("note", "")
-        if "filter by relationship_type" in note:
-            # Filter edges by relationship_type
-            data = [edge for edge in data if edge.get("relationship_type") == edge_type]
-
-        # Add source metadata
-        active_mode = edge_sources[edge_type].get("active_mode", "baseline")
-        for edge in data:
-            if "metadata" not in edge:
-                edge["metadata"] = {}
-            edge["metadata"]["loaded_from"] = str(file_path)
-            edge["metadata"]["config_mode"] = active_mode
-
+        filter_by_type = _filters_by_type(edge_sources[edge_type])
+
+        if filter_by_type:
+            # Stream the shared file so edges of other types are never kept
+            edges = (
+                edge for edge in _iter_json_items(file_path)
+                if edge.get("relationship_type") == edge_type
+            )
+        else:
+            edges = _read_json_cached(file_path)
+
+        # Attach source metadata to the list, not to each edge
+        data = ProvenancedList(
+            edges,
+            loaded_from=str(file_path),
+            config_mode=edge_sources[edge_type].get("active_mode", "baseline"),
+        )
+
+        self._cache[key] = data
         return data
 
     def load_all_edges(self) -> Dict[str, List[Dict]]:
@@ -182,15 +348,88 @@ class ConfiguredDataLoader:
         Returns:
             Dictionary mapping edge type name to list of edges
         """
-        all_edges = {}
+        return self._load_all("edge_sources", self.load_edges)
+
+    def _load_all(
+        self,
+        section: str,
+        load: Callable[[str], ProvenancedList]
+    ) -> Dict[str, List[Dict]]:
+        """
+        Load every type in a config section.
+
+        Readahead is requested for all active files up front, so the kernel
+        reads later files while earlier ones are decoded. Types are decoded
+        one after another: orjson holds the GIL while parsing (including the
+        page faults on the mapped file), so worker threads measured slower
+        than a plain loop. Results and warnings keep configuration order.
+
+        Args:
+            section: "entity_sources" or "edge_sources"
+            load: load_entities or load_edges
+
+        Returns:
+            Dictionary mapping type name to loaded list
+        """
+        sources = self.config.get(section, {})
+        names = list(sources)
+        loaded = {}
+        if not names:
+            return loaded
 
-        for edge_type in self.config.get("edge_sources", {}).keys():
+        _prefetch({self._get_active_file(config) for config in sources.values()} - {None})
+
+        for name in names:
             try:
-                all_edges[edge_type] = self.load_edges(edge_type)
+                loaded[name] = load(name)
             except (ValueError, FileNotFoundError) as e:
-                print(f"⚠ Warning: Could not load {edge_type}: {e}")
+                print(f"⚠ Warning: Could not load {name}: {e}")
+
+        return loaded
+
+    def _count_records(
+        self,
+        kind: str,
+        name: str,
+        source_config: Dict,
+        file_counts: Dict[str, Any]
+    ) -> int:
+        """
+        Count the records load_entities/load_edges would return.
 
-        return all_edges
+        Args:
+            kind: "entity" or "edge"
+            name: Entity or edge type name
+            source_config: The type's source configuration
+            file_counts: Per-call memo of file path -> record count, or
+                relationship_type Counter for filtered edge files
+
+        Returns:
+            Number of records
+        """
+        file_path = self._get_active_file(source_config)
+        if not file_path:
+            raise ValueError(f"No active file configured for {kind} type: {name}")
+
+        key = self._cache_key(kind, name, file_path)
+        if key in self._cache:
+            return len(self._cache[key])
+
+        path = key[2]
+        if kind == "edge" and _filters_by_type(source_config):
+            counts = file_counts.get(path)
+            if not isinstance(counts, Counter):
+                counts = file_counts[path] = Counter(
+                    edge.get("relationship_type") for edge in _iter_json_items(file_path)
+                )
+            return counts[name]
+
+        count = file_counts.get(path)
+        if count is None:
+            count = file_counts[path] = len(_read_json_cached(file_path))
+        elif isinstance(count, Counter):
+            count = sum(count.values())
+        return count
 
     def get_stats(self) -> Dict:
         """
@@ -207,27 +446,22 @@ class ConfiguredDataLoader:
             "active_modes": {"entities": {}, "edges": {}}
         }
 
-        # Entity stats
-        for entity_type, entity_config in self.config.get("entity_sources", {}).items():
-            try:
-                entities = self.load_entities(entity_type)
-                count = len(entities)
-                stats["entities"][entity_type] = count
-                stats["total_entities"] += count
-                stats["active_modes"]["entities"][entity_type] = entity_config.get("active_mode", "baseline")
-            except (ValueError, FileNotFoundError):
-                stats["entities"][entity_type] = 0
-
-        # Edge stats
-        for edge_type, edge_config in self.config.get("edge_sources", {}).items():
-            try:
-                edges = self.load_edges(edge_type)
-                count = len(edges)
-                stats["edges"][edge_type] = count
-                stats["total_edges"] += count
-                stats["active_modes"]["edges"][edge_type] = edge_config.get("active_mode", "baseline")
-            except (ValueError, FileNotFoundError):
-                stats["edges"][edge_type] = 0
+        # Count without annotating or caching records; a file shared by
+        # several edge types is decoded once
+        file_counts: Dict[str, Any] = {}
+        for section, kind, stats_key in (
+            ("entity_sources", "entity", "entities"),
+            ("edge_sources", "edge", "edges"),
+        ):
+            for source_name, source_config in self.config.get(section, {}).items():
+                try:
+                    count = self._count_records(kind, source_name, source_config, file_counts)
+                except (ValueError, FileNotFoundError):
+                    stats[stats_key][source_name] = 0
+                    continue
+                stats[stats_key][source_name] = count
+                stats[f"total_{stats_key}"] += count
+                stats["active_modes"][stats_key][source_name] = source_config.get("active_mode", "baseline")
 
         return stats
 
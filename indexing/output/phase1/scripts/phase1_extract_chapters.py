@@ -13,25 +13,80 @@ Output files:
 - wills_eye_text_blocks.json
 """
 
+import hashlib
+import itertools
 import json
 import zipfile
 from pathlib import Path
 from typing import Dict, List, Any
-from xml.etree import ElementTree as ET
 from collections import defaultdict
 
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:  # optional, falls back to the stdlib ElementTree
+    from xml.etree import ElementTree as ET
+    HAVE_LXML = False
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
 # Namespace map for XHTML
 XHTML_NS = {'xhtml': 'http://www.w3.org/1999/xhtml'}
 
-def extract_epub_content(epub_path: Path) -> Dict[str, str]:
-    """Extract XHTML content from EPUB file."""
-    content = {}
-    with zipfile.ZipFile(epub_path, 'r') as epub:
-        # Get all XHTML files
-        for item in epub.namelist():
-            if item.endswith('.xhtml'):
-                content[item] = epub.read(item).decode('utf-8')
-    return content
+if HAVE_LXML:
+    # Drop comments/PIs like the stdlib parser does, so every child is an element
+    _XML_PARSER = ET.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False)
+    _find_list_items = ET.XPath('.//xhtml:li', namespaces=XHTML_NS)
+else:
+    _XML_PARSER = None
+
+    def _find_list_items(elem):
+        return elem.findall('.//xhtml:li', XHTML_NS)
+
+def compute_source_hash(paths: List[Path]) -> str:
+    """SHA-256 over the given input files, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def outputs_up_to_date(report_file: Path, output_files: List[Path], source_hash: str) -> bool:
+    """Whether every output exists and the report was written from the same sources."""
+    if not all(path.exists() for path in output_files):
+        return False
+    try:
+        with open(report_file, encoding='utf-8') as f:
+            return json.load(f).get('source_hash') == source_hash
+    except (OSError, ValueError):
+        return False
+
+def list_xhtml_entries(epub: zipfile.ZipFile) -> List[str]:
+    """List the XHTML entries in an open EPUB file."""
+    return [item for item in epub.namelist() if item.endswith('.xhtml')]
+
+def write_json(path: Path, obj: Any):
+    """Write compact UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    path.write_bytes(data)
+
+def write_json_lines(path: Path, records: List[Dict]):
+    """Write one compact JSON record per line so readers can stream the file."""
+    with open(path, 'wb') as f:
+        if orjson is not None:
+            for record in records:
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                f.write(b'\n')
 
 def get_heading_level(tag: str) -> int:
     """Get heading level from tag name (h1->1, h2->2, etc.)."""
@@ -43,19 +98,21 @@ def get_heading_level(tag: str) -> int:
     return 0
 
 def extract_text_recursive(element) -> str:
-    """Recursively extract text from element and children."""
-    text_parts = []
-    if element.text:
-        text_parts.append(element.text.strip())
-    for child in element:
-        text_parts.append(extract_text_recursive(child))
-        if child.tail:
-            text_parts.append(child.tail.strip())
-    return ' '.join(filter(None, text_parts))
-
-def parse_chapter_structure(chapter_html: str, chapter_num: int, chapter_title: str) -> Dict[str, Any]:
-    """Parse a chapter's HTML into structured sections."""
-    root = ET.fromstring(chapter_html)
+    """Extract text from element and children, joining stripped pieces with spaces."""
+    return ' '.join(filter(None, [part.strip() for part in element.itertext()]))
+
+def parse_xhtml(source):
+    """Parse chapter XHTML (str, bytes or binary file object) into an element tree root."""
+    if isinstance(source, str):
+        # lxml rejects str input that carries an encoding declaration
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        return ET.fromstring(source, _XML_PARSER)
+    return ET.parse(source, _XML_PARSER).getroot()
+
+def parse_chapter_structure(chapter_html, chapter_num: int, chapter_title: str) -> Dict[str, Any]:
+    """Parse a chapter's HTML (str, bytes or binary file object) into structured sections."""
+    root = parse_xhtml(chapter_html)
     body = root.find('.//xhtml:body', XHTML_NS)
 
     if body is None:
@@ -66,8 +123,13 @@ def parse_chapter_structure(chapter_html: str, chapter_num: int, chapter_title:
         }
 
     sections = []
+    # One copy per distinct heading; condition entries repeat the same
+    # headings ("Symptoms", "Treatment", ...) many times
+    headings: Dict[str, str] = {}
     current_section = None
-    section_stack = []  # Track hierarchy
+    # Open section per heading level (index = level); the parent of a new
+    # heading is the nearest open section above its level
+    open_sections: List[Any] = [None] * 10
 
     # Process all children of body sequentially
     for elem in body:
@@ -82,24 +144,22 @@ def parse_chapter_structure(chapter_html: str, chapter_num: int, chapter_title:
 
             # Create new section
             section = {
-                'heading': heading_text,
+                'heading': headings.setdefault(heading_text, heading_text),
                 'level': level,
                 'content_blocks': [],
                 'subsections': []
             }
 
             # Maintain hierarchy
-            while section_stack and section_stack[-1]['level'] >= level:
-                section_stack.pop()
-
-            if section_stack:
+            parent = next((s for s in reversed(open_sections[:level]) if s is not None), None)
+            if parent is not None:
                 # Add as subsection to parent
-                section_stack[-1]['subsections'].append(section)
+                parent['subsections'].append(section)
             else:
                 # Top-level section
                 sections.append(section)
 
-            section_stack.append(section)
+            open_sections[level:] = [section] + [None] * (len(open_sections) - level - 1)
             current_section = section
 
         # Process divs (may contain paragraphs or lists)
@@ -118,7 +178,7 @@ def parse_chapter_structure(chapter_html: str, chapter_num: int, chapter_title:
                 elif child_tag in ['ul', 'ol']:
                     # Extract list items
                     items = []
-                    for li in child.findall('.//xhtml:li', XHTML_NS):
+                    for li in _find_list_items(child):
                         li_text = extract_text_recursive(li)
                         if li_text:
                             items.append(li_text.strip())
@@ -146,34 +206,37 @@ def parse_chapter_structure(chapter_html: str, chapter_num: int, chapter_title:
 def extract_text_blocks(chapters_data: List[Dict]) -> List[Dict[str, Any]]:
     """Extract flat text blocks with hierarchy references."""
     text_blocks = []
-    block_id = 0
-
-    def process_section(section: Dict, chapter_num: int, chapter_title: str, parent_path: str = ""):
-        nonlocal block_id
-
-        # Create path for this section
-        section_path = f"{parent_path}/{section['heading']}" if parent_path else section['heading']
-
-        # Add text blocks from this section
-        for block in section.get('content_blocks', []):
-            if block['type'] == 'paragraph' and len(block['text']) > 20:  # Filter very short blocks
-                text_blocks.append({
-                    'block_id': f"block_{block_id:05d}",
-                    'chapter_number': chapter_num,
-                    'chapter_title': chapter_title,
-                    'section_path': section_path,
-                    'heading_level': section['level'],
-                    'text': block['text']
-                })
-                block_id += 1
-
-        # Process subsections recursively
-        for subsection in section.get('subsections', []):
-            process_section(subsection, chapter_num, chapter_title, section_path)
+    block_ids = map("block_{:05d}".format, itertools.count())
 
     for chapter in chapters_data:
-        for section in chapter['sections']:
-            process_section(section, chapter['chapter_number'], chapter['title'])
+        chapter_num = chapter['chapter_number']
+        chapter_title = chapter['title']
+
+        # Depth-first walk with an explicit stack of (section, parent_path)
+        stack = [(section, "") for section in reversed(chapter['sections'])]
+        while stack:
+            section, parent_path = stack.pop()
+
+            # Create path for this section
+            section_path = f"{parent_path}/{section['heading']}" if parent_path else section['heading']
+
+            # Add text blocks from this section
+            for block in section.get('content_blocks', []):
+                text = block.get('text')
+                if not text or len(text) <= 20:  # Filter very short blocks first
+                    continue
+                if block['type'] == 'paragraph':
+                    text_blocks.append({
+                        'block_id': next(block_ids),
+                        'chapter_number': chapter_num,
+                        'chapter_title': chapter_title,
+                        'section_path': section_path,
+                        'heading_level': section['level'],
+                        'text': text
+                    })
+
+            # Visit subsections next, in document order
+            stack.extend((subsection, section_path) for subsection in reversed(section.get('subsections', [])))
 
     return text_blocks
 
@@ -191,31 +254,42 @@ def main():
     print("Phase 1.1: Extracting Chapter Content")
     print(f"Processing EPUB: {epub_path}")
 
-    # Extract EPUB content
-    epub_content = extract_epub_content(epub_path)
-    print(f"Extracted {len(epub_content)} XHTML files")
+    # Skip the whole run when the EPUB, chapter metadata and this script are
+    # unchanged since the outputs were written
+    report_file = output_dir / "phase1_1_report.json"
+    source_hash = compute_source_hash([epub_path, structure_summary, Path(__file__)])
+    output_files = [
+        output_dir / name for name in (
+            "wills_eye_chapters_structured.json",
+            "wills_eye_text_blocks.json",
+            "wills_eye_text_blocks.jsonl",
+        )
+    ]
+    if outputs_up_to_date(report_file, output_files, source_hash):
+        print("Cache hit: sources unchanged, outputs are up to date")
+        return
 
-    # Parse chapters
+    # Parse chapters, streaming each XHTML entry from the EPUB as it is needed
     chapters_structured = []
-    for meta in chapter_metadata[:5]:  # Limit to first 5 chapters for initial run
-        chapter_file = f"OEBPS/XHTML/{meta['file']}"
-        if chapter_file not in epub_content:
-            print(f"Warning: {chapter_file} not found")
-            continue
-
-        print(f"Processing Chapter {meta['number']}: {meta['title']}")
-        chapter_data = parse_chapter_structure(
-            epub_content[chapter_file],
-            meta['number'],
-            meta['title']
-        )
-        chapters_structured.append(chapter_data)
-        print(f"  - Extracted {len(chapter_data['sections'])} top-level sections")
+    with zipfile.ZipFile(epub_path, 'r') as epub:
+        xhtml_entries = set(list_xhtml_entries(epub))
+        print(f"Found {len(xhtml_entries)} XHTML files")
+
+        for meta in chapter_metadata[:5]:  # Limit to first 5 chapters for initial run
+            chapter_file = f"OEBPS/XHTML/{meta['file']}"
+            if chapter_file not in xhtml_entries:
+                print(f"Warning: {chapter_file} not found")
+                continue
+
+            print(f"Processing Chapter {meta['number']}: {meta['title']}")
+            with epub.open(chapter_file) as fh:
+                chapter_data = parse_chapter_structure(fh, meta['number'], meta['title'])
+            chapters_structured.append(chapter_data)
+            print(f"  - Extracted {len(chapter_data['sections'])} top-level sections")
 
     # Save structured chapters
     output_file = output_dir / "wills_eye_chapters_structured.json"
-    with open(output_file, 'w') as f:
-        json.dump(chapters_structured, f, indent=2)
+    write_json(output_file, chapters_structured)
     print(f"\nSaved: {output_file}")
 
     # Extract text blocks
@@ -223,8 +297,11 @@ def main():
     text_blocks = extract_text_blocks(chapters_structured)
 
     output_file = output_dir / "wills_eye_text_blocks.json"
-    with open(output_file, 'w') as f:
-        json.dump(text_blocks, f, indent=2)
+    write_json(output_file, text_blocks)
+    print(f"Saved: {output_file}")
+
+    output_file = output_dir / "wills_eye_text_blocks.jsonl"
+    write_json_lines(output_file, text_blocks)
     print(f"Saved: {output_file}")
     print(f"Total text blocks: {len(text_blocks)}")
 
@@ -236,11 +313,12 @@ def main():
         'total_text_blocks': len(text_blocks),
         'output_files': [
             'wills_eye_chapters_structured.json',
-            'wills_eye_text_blocks.json'
-        ]
+            'wills_eye_text_blocks.json',
+            'wills_eye_text_blocks.jsonl'
+        ],
+        'source_hash': source_hash
     }
 
-    report_file = output_dir / "phase1_1_report.json"
     with open(report_file, 'w') as f:
         json.dump(report, f, indent=2)
     print(f"\nReport: {report_file}")
@@ -4,14 +4,37 @@ Phase 1.1: Extract and Parse Chapter Content from Wills Eye Manual EPUB (V2)
 
 Improved version that properly handles the XHTML structure where content
 follows headings in subsequent div elements.
+
+The module type-checks cleanly under mypyc and can be compiled ahead of time
+for import by other scripts:
+
+    pip install mypy
+    mypyc --ignore-missing-imports phase1_extract_chapters_v2.py
+
+Parsing itself already runs in C (lxml/expat), so expect a modest gain.
 """
 
+import hashlib
 import json
+import queue
 import sys
+import threading
 import zipfile
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from xml.etree import ElementTree as ET
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:  # optional, falls back to the stdlib ElementTree
+    from xml.etree import ElementTree as ET
+    HAVE_LXML = False
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
 
 # Fix console encoding for Windows
 if sys.platform == 'win32':
@@ -20,10 +43,104 @@ if sys.platform == 'win32':
 # Namespace map for XHTML
 NS = {'xhtml': 'http://www.w3.org/1999/xhtml'}
 
+# Heading tag -> level, and memo of namespaced tag -> local name; documents
+# use a handful of distinct tags, so each is split only once
+_HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_LOCAL_NAMES: Dict[str, str] = {}
+
+if HAVE_LXML:
+    # Drop comments/PIs like the stdlib parser does, so every child is an element
+    _XML_PARSER = ET.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False)
+    _find_list_items = ET.XPath('.//xhtml:li', namespaces=NS)
+else:
+    _XML_PARSER = None
+
+    def _find_list_items(elem):
+        return elem.findall('.//xhtml:li', NS)
+
+def parse_xhtml(source):
+    """Parse chapter XHTML (str, bytes or binary file object) into an element tree root."""
+    if isinstance(source, str):
+        # lxml rejects str input that carries an encoding declaration
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        return ET.fromstring(source, _XML_PARSER)
+    return ET.parse(source, _XML_PARSER).getroot()
+
+def write_json(path: Path, obj: Any):
+    """Write compact UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    path.write_bytes(data)
+
+def write_json_lines(path: Path, records: List[Dict]):
+    """Write one compact JSON record per line so readers can stream the file."""
+    with open(path, 'wb') as f:
+        if orjson is not None:
+            for record in records:
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                f.write(b'\n')
+
+def compute_source_hash(paths: List[Path]) -> str:
+    """SHA-256 over the given input files, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def outputs_up_to_date(report_file: Path, output_files: List[Path], source_hash: str) -> bool:
+    """Whether every output exists and the report was written from the same sources."""
+    if not all(path.exists() for path in output_files):
+        return False
+    try:
+        with open(report_file, encoding='utf-8') as f:
+            return json.load(f).get('source_hash') == source_hash
+    except (OSError, ValueError):
+        return False
+
+def iter_epub_entries(epub: zipfile.ZipFile, names: List[str], prefetch: int = 4) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (name, bytes) for EPUB entries in order, decompressing ahead.
+
+    A reader thread decompresses up to `prefetch` entries into a bounded
+    queue while the caller parses the previous one; zlib and the XML parsers
+    release the GIL, so the two overlap.
+    """
+    entries: queue.Queue = queue.Queue(maxsize=prefetch)
+    done = object()
+
+    def reader():
+        try:
+            for name in names:
+                entries.put((name, epub.read(name)))
+        except BaseException as e:  # re-raised in the consuming thread
+            entries.put(e)
+        finally:
+            entries.put(done)
+
+    threading.Thread(target=reader, name="epub-reader", daemon=True).start()
+    while True:
+        item = entries.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
 def get_tag(elem) -> str:
     """Get tag name without namespace."""
     tag = elem.tag
-    return tag.split('}')[1] if '}' in tag else tag
+    name = _LOCAL_NAMES.get(tag)
+    if name is None:
+        name = _LOCAL_NAMES[tag] = tag.split('}')[1] if '}' in tag else tag
+    return name
 
 def get_text(elem, recursive=True) -> str:
     """Extract text from element."""
@@ -33,138 +150,132 @@ def get_text(elem, recursive=True) -> str:
 
 def is_heading(tag: str) -> bool:
     """Check if tag is a heading."""
-    return tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+    return tag in _HEADING_LEVELS
 
 def get_heading_level(tag: str) -> int:
     """Get heading level (1-6)."""
-    if is_heading(tag):
-        return int(tag[1])
-    return 0
+    return _HEADING_LEVELS.get(tag, 0)
 
 def extract_list_items(elem) -> List[str]:
     """Extract list items from ul/ol element."""
     items = []
-    for li in elem.findall('.//xhtml:li', NS):
+    for li in _find_list_items(elem):
         text = get_text(li)
         if text:
             items.append(text)
     return items
 
-def extract_chapter_sections(chapter_html: str, chapter_num: int, chapter_title: str) -> Dict[str, Any]:
-    """Extract structured sections from chapter HTML."""
-    root = ET.fromstring(chapter_html)
+def extract_chapter_sections(chapter_html, chapter_num: int, chapter_title: str) -> Dict[str, Any]:
+    """Extract structured sections from chapter HTML (str, bytes or binary file object)."""
+    return extract_root_sections(parse_xhtml(chapter_html), chapter_num, chapter_title)
+
+def append_content_blocks(elem, tag: str, content_blocks: List[Dict]):
+    """Append the content blocks of one body-level element to a section."""
+    if tag == 'div':
+        # Extract content from div
+        for child in elem:
+            child_tag = get_tag(child)
+
+            if child_tag == 'p':
+                text = get_text(child)
+                if text and len(text) > 5:
+                    content_blocks.append({
+                        'type': 'paragraph',
+                        'text': text
+                    })
+            elif child_tag in ['ul', 'ol']:
+                items = extract_list_items(child)
+                if items:
+                    content_blocks.append({
+                        'type': 'list',
+                        'list_type': child_tag,
+                        'items': items
+                    })
+            elif child_tag == 'span':
+                # Sometimes spans contain important text
+                text = get_text(child)
+                if text and len(text) > 10:
+                    content_blocks.append({
+                        'type': 'text',
+                        'text': text
+                    })
+
+        # Also check for direct text in div
+        div_text = get_text(elem, recursive=False)
+        if div_text and len(div_text) > 5:
+            content_blocks.append({
+                'type': 'text',
+                'text': div_text
+            })
+
+    elif tag == 'p':
+        text = get_text(elem)
+        if text and len(text) > 5:
+            content_blocks.append({
+                'type': 'paragraph',
+                'text': text
+            })
+
+    elif tag in ['ul', 'ol']:
+        items = extract_list_items(elem)
+        if items:
+            content_blocks.append({
+                'type': 'list',
+                'list_type': tag,
+                'items': items
+            })
+
+def extract_root_sections(root, chapter_num: int, chapter_title: str) -> Dict[str, Any]:
+    """Extract structured sections from an already parsed chapter root element."""
     body = root.find('.//xhtml:body', NS)
 
     if body is None:
         return {'chapter_number': chapter_num, 'title': chapter_title, 'sections': []}
 
-    # Convert to list for indexed access
-    children = list(body)
     sections = []
-    section_stack = []
-
-    i = 0
-    while i < len(children):
-        elem = children[i]
+    # Open section per heading level (index = level); the parent of a new
+    # heading is the nearest open section above its level
+    open_sections: List[Optional[Dict]] = [None] * 7
+    # Section currently collecting content. Deeper headings are absorbed into
+    # it; a heading of the same or higher level closes it, and an empty one
+    # leaves nothing collecting until the next heading.
+    current: Optional[Dict[str, Any]] = None
+
+    for elem in body:
         tag = get_tag(elem)
 
-        # Process headings
         if is_heading(tag):
             level = get_heading_level(tag)
-            heading = get_text(elem)
+            if current is not None and level > current['level']:
+                continue
 
+            heading = get_text(elem)
             if not heading:
-                i += 1
+                current = None
                 continue
 
-            # Create new section
-            section = {
+            section: Dict[str, Any] = {
                 'heading': heading,
                 'level': level,
                 'content_blocks': [],
                 'subsections': []
             }
 
-            # Collect content until next heading of same or higher level
-            j = i + 1
-            while j < len(children):
-                next_elem = children[j]
-                next_tag = get_tag(next_elem)
-
-                # Stop at next heading of same or higher level
-                if is_heading(next_tag) and get_heading_level(next_tag) <= level:
-                    break
-
-                # Process content
-                if next_tag == 'div':
-                    # Extract content from div
-                    for child in next_elem:
-                        child_tag = get_tag(child)
-
-                        if child_tag == 'p':
-                            text = get_text(child)
-                            if text and len(text) > 5:
-                                section['content_blocks'].append({
-                                    'type': 'paragraph',
-                                    'text': text
-                                })
-                        elif child_tag in ['ul', 'ol']:
-                            items = extract_list_items(child)
-                            if items:
-                                section['content_blocks'].append({
-                                    'type': 'list',
-                                    'list_type': child_tag,
-                                    'items': items
-                                })
-                        elif child_tag == 'span':
-                            # Sometimes spans contain important text
-                            text = get_text(child)
-                            if text and len(text) > 10:
-                                section['content_blocks'].append({
-                                    'type': 'text',
-                                    'text': text
-                                })
-
-                    # Also check for direct text in div
-                    div_text = get_text(next_elem, recursive=False)
-                    if div_text and len(div_text) > 5:
-                        section['content_blocks'].append({
-                            'type': 'text',
-                            'text': div_text
-                        })
-
-                elif next_tag == 'p':
-                    text = get_text(next_elem)
-                    if text and len(text) > 5:
-                        section['content_blocks'].append({
-                            'type': 'paragraph',
-                            'text': text
-                        })
-
-                elif next_tag in ['ul', 'ol']:
-                    items = extract_list_items(next_elem)
-                    if items:
-                        section['content_blocks'].append({
-                            'type': 'list',
-                            'list_type': next_tag,
-                            'items': items
-                        })
-
-                j += 1
-
             # Maintain hierarchy
-            while section_stack and section_stack[-1]['level'] >= level:
-                section_stack.pop()
-
-            if section_stack:
-                section_stack[-1]['subsections'].append(section)
+            parent = None
+            for open_level in range(level - 1, 0, -1):
+                if open_sections[open_level] is not None:
+                    parent = open_sections[open_level]
+                    break
+            if parent is not None:
+                parent['subsections'].append(section)
             else:
                 sections.append(section)
 
-            section_stack.append(section)
-            i = j  # Jump to next unprocessed element
-        else:
-            i += 1
+            open_sections[level:] = [section] + [None] * (6 - level)
+            current = section
+        elif current is not None:
+            append_content_blocks(elem, tag, current['content_blocks'])
 
     return {
         'chapter_number': chapter_num,
@@ -172,56 +283,92 @@ def extract_chapter_sections(chapter_html: str, chapter_num: int, chapter_title:
         'sections': sections
     }
 
-def extract_text_blocks(chapters: List[Dict]) -> List[Dict]:
-    """Extract flat text blocks for GraphRAG processing."""
-    blocks = []
-    block_id = 0
-
-    def process_section(sec, ch_num, ch_title, path=""):
-        nonlocal block_id
-
-        section_path = f"{path}/{sec['heading']}" if path else sec['heading']
-
-        # Add content blocks
-        for block in sec['content_blocks']:
-            if block['type'] in ['paragraph', 'text']:
-                text = block['text']
-                if len(text) > 20:  # Filter very short blocks
-                    blocks.append({
-                        'block_id': f"block_{block_id:05d}",
-                        'chapter_number': ch_num,
-                        'chapter_title': ch_title,
-                        'section_path': section_path,
-                        'heading_level': sec['level'],
-                        'text': text
-                    })
-                    block_id += 1
-
-            elif block['type'] == 'list':
-                # Combine list items into text block
-                list_text = '; '.join(block['items'])
-                if len(list_text) > 20:
-                    blocks.append({
-                        'block_id': f"block_{block_id:05d}",
-                        'chapter_number': ch_num,
-                        'chapter_title': ch_title,
-                        'section_path': section_path,
-                        'heading_level': sec['level'],
-                        'text': f"List: {list_text}",
-                        'is_list': True
-                    })
-                    block_id += 1
-
-        # Process subsections
-        for subsec in sec['subsections']:
-            process_section(subsec, ch_num, ch_title, section_path)
+def extract_text_block_columns(chapters: List[Dict]) -> Dict[str, Any]:
+    """
+    Extract flat text blocks for GraphRAG processing as parallel columns.
+
+    Row i of every column describes block_{i:05d}. Section paths and chapter
+    titles are stored once in lookup tables instead of on every block.
+    """
+    chapter_numbers: List[int] = []
+    section_path_ids: List[int] = []
+    heading_levels: List[int] = []
+    texts: List[str] = []
+    is_list: List[bool] = []
+    section_paths: Dict[str, int] = {}
+    chapter_titles: Dict[int, str] = {}
+
+    def add_block(ch_num: int, section_path: str, level: int, text: str, listed: bool):
+        chapter_numbers.append(ch_num)
+        section_path_ids.append(section_paths.setdefault(section_path, len(section_paths)))
+        heading_levels.append(level)
+        texts.append(text)
+        is_list.append(listed)
 
     for chapter in chapters:
-        for section in chapter['sections']:
-            process_section(section, chapter['chapter_number'], chapter['title'])
+        ch_num = chapter['chapter_number']
+        chapter_titles[ch_num] = chapter['title']
+
+        # Depth-first walk with an explicit stack of (section, parent_path)
+        stack = [(section, "") for section in reversed(chapter['sections'])]
+        while stack:
+            sec, path = stack.pop()
+            section_path = f"{path}/{sec['heading']}" if path else sec['heading']
+
+            # Add content blocks
+            for block in sec['content_blocks']:
+                if block['type'] in ['paragraph', 'text']:
+                    text = block['text']
+                    if len(text) > 20:  # Filter very short blocks
+                        add_block(ch_num, section_path, sec['level'], text, False)
+
+                elif block['type'] == 'list':
+                    # Combine list items into text block; its length is known
+                    # before joining, so short lists are skipped without building it
+                    items = block['items']
+                    if sum(map(len, items)) + 2 * (len(items) - 1) > 20:
+                        add_block(ch_num, section_path, sec['level'], f"List: {'; '.join(items)}", True)
+
+            # Visit subsections next, in document order
+            stack.extend((subsec, section_path) for subsec in reversed(sec['subsections']))
 
+    return {
+        'chapter_titles': chapter_titles,
+        'section_paths': list(section_paths),
+        'chapter_number': chapter_numbers,
+        'section_path_id': section_path_ids,
+        'heading_level': heading_levels,
+        'text': texts,
+        'is_list': is_list
+    }
+
+def columns_to_text_blocks(columns: Dict[str, Any]) -> List[Dict]:
+    """Expand text block columns into one record per block."""
+    chapter_titles = columns['chapter_titles']
+    section_paths = columns['section_paths']
+    blocks = []
+    rows = zip(
+        columns['chapter_number'], columns['section_path_id'],
+        columns['heading_level'], columns['text'], columns['is_list']
+    )
+    for block_id, (ch_num, path_id, level, text, listed) in enumerate(rows):
+        block = {
+            'block_id': f"block_{block_id:05d}",
+            'chapter_number': ch_num,
+            'chapter_title': chapter_titles[ch_num],
+            'section_path': section_paths[path_id],
+            'heading_level': level,
+            'text': text
+        }
+        if listed:
+            block['is_list'] = True
+        blocks.append(block)
     return blocks
 
+def extract_text_blocks(chapters: List[Dict]) -> List[Dict]:
+    """Extract flat text blocks for GraphRAG processing."""
+    return columns_to_text_blocks(extract_text_block_columns(chapters))
+
 def main():
     base_dir = Path(__file__).parent.parent
     epub_path = base_dir / "data" / "The Wills Eye Manual - Kalla Gervasio.epub"
@@ -232,63 +379,85 @@ def main():
     print("Phase 1.1: Chapter Content Extraction")
     print("=" * 60)
 
+    # Skip the whole run when the EPUB, chapter metadata and this script are
+    # unchanged since the outputs were written
+    report_file = output_dir / "phase1_1_report.json"
+    source_hash = compute_source_hash([epub_path, structure_file, Path(__file__)])
+    output_files = [
+        output_dir / name for name in (
+            "wills_eye_chapters_structured.json",
+            "wills_eye_text_blocks.json",
+            "wills_eye_text_blocks.jsonl",
+            "wills_eye_text_blocks_columnar.json",
+        )
+    ]
+    if outputs_up_to_date(report_file, output_files, source_hash):
+        print("\n✓ Cache hit: sources unchanged, outputs are up to date")
+        return
+
     # Load chapter metadata
     with open(structure_file) as f:
         metadata = json.load(f)
 
-    # Extract EPUB content
+    # Process all chapters; entries are decompressed a few chapters ahead in
+    # a reader thread while the current one is parsed
     print(f"\nExtracting from: {epub_path.name}")
-    epub_content = {}
+    chapters = []
     with zipfile.ZipFile(epub_path) as epub:
-        for item in epub.namelist():
-            if item.endswith('.xhtml'):
-                epub_content[item] = epub.read(item).decode('utf-8')
-    print(f"Found {len(epub_content)} XHTML files")
+        xhtml_entries = {item for item in epub.namelist() if item.endswith('.xhtml')}
+        print(f"Found {len(xhtml_entries)} XHTML files")
 
-    # Process all chapters
-    chapters = []
-    for meta in metadata:
-        chapter_file = f"OEBPS/XHTML/{meta['file']}"
-
-        if chapter_file not in epub_content:
-            print(f"⚠ Skipping Chapter {meta['number']}: file not found")
-            continue
-
-        print(f"\n📖 Chapter {meta['number']}: {meta['title']}")
-        chapter = extract_chapter_sections(
-            epub_content[chapter_file],
-            meta['number'],
-            meta['title']
-        )
+        chapter_files = [f"OEBPS/XHTML/{meta['file']}" for meta in metadata]
+        entries = iter_epub_entries(epub, [f for f in chapter_files if f in xhtml_entries])
+
+        for meta, chapter_file in zip(metadata, chapter_files):
+            if chapter_file not in xhtml_entries:
+                print(f"⚠ Skipping Chapter {meta['number']}: file not found")
+                continue
 
-        total_sections = len(chapter['sections'])
-        total_subsections = sum(len(s.get('subsections', [])) for s in chapter['sections'])
-        total_blocks = sum(len(s.get('content_blocks', [])) for s in chapter['sections'])
+            print(f"\n📖 Chapter {meta['number']}: {meta['title']}")
+            _, raw = next(entries)
+            root = parse_xhtml(raw)
+            chapter = extract_root_sections(root, meta['number'], meta['title'])
 
-        print(f"   Sections: {total_sections}")
-        print(f"   Subsections: {total_subsections}")
-        print(f"   Content blocks: {total_blocks}")
+            total_sections = len(chapter['sections'])
+            total_subsections = sum(len(s.get('subsections', [])) for s in chapter['sections'])
+            total_blocks = sum(len(s.get('content_blocks', [])) for s in chapter['sections'])
 
-        chapters.append(chapter)
+            print(f"   Sections: {total_sections}")
+            print(f"   Subsections: {total_subsections}")
+            print(f"   Content blocks: {total_blocks}")
+
+            chapters.append(chapter)
 
     # Save structured chapters
     output_file = output_dir / "wills_eye_chapters_structured.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(chapters, f, indent=2, ensure_ascii=False)
+    write_json(output_file, chapters)
     print(f"\n✓ Saved: {output_file.name}")
 
     # Extract text blocks
     print("\n" + "=" * 60)
     print("Extracting text blocks...")
-    blocks = extract_text_blocks(chapters)
+    columns = extract_text_block_columns(chapters)
+    blocks = columns_to_text_blocks(columns)
 
     output_file = output_dir / "wills_eye_text_blocks.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(blocks, f, indent=2, ensure_ascii=False)
+    write_json(output_file, blocks)
     print(f"✓ Saved: {output_file.name}")
     print(f"  Total blocks: {len(blocks)}")
 
+    # One block per line, for readers that stream records
+    output_file = output_dir / "wills_eye_text_blocks.jsonl"
+    write_json_lines(output_file, blocks)
+    print(f"✓ Saved: {output_file.name}")
+
+    # Same blocks in columnar form, for readers that scan single fields
+    output_file = output_dir / "wills_eye_text_blocks_columnar.json"
+    write_json(output_file, columns)
+    print(f"✓ Saved: {output_file.name}")
+
     # Generate report
+    blocks_per_chapter = Counter(columns['chapter_number'])
     report = {
         'phase': '1.1 - Chapter Content Extraction',
         'chapters_processed': len(chapters),
@@ -299,13 +468,13 @@ def main():
                 'number': ch['chapter_number'],
                 'title': ch['title'],
                 'sections': len(ch['sections']),
-                'blocks': len([b for b in blocks if b['chapter_number'] == ch['chapter_number']])
+                'blocks': blocks_per_chapter[ch['chapter_number']]
             }
             for ch in chapters
-        ]
+        ],
+        'source_hash': source_hash
     }
 
-    report_file = output_dir / "phase1_1_report.json"
     with open(report_file, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2)
 
@@ -6,12 +6,28 @@ Extracts lists (differential diagnoses, symptoms, treatments, etc.)
 and creates structured JSON with medical concept mapping.
 """
 
+import hashlib
+import io
 import json
+import os
+import pickle
 import sys
 import zipfile
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Any
-from xml.etree import ElementTree as ET
+from typing import Dict, List, Any, Tuple
+
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:  # optional, falls back to the stdlib ElementTree
+    from xml.etree import ElementTree as ET
+    HAVE_LXML = False
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
 
 # Fix console encoding for Windows
 if sys.platform == 'win32':
@@ -19,46 +35,59 @@ if sys.platform == 'win32':
 
 NS = {'xhtml': 'http://www.w3.org/1999/xhtml'}
 
-def get_tag(elem) -> str:
-    """Get tag name without namespace."""
-    tag = elem.tag
-    return tag.split('}')[1] if '}' in tag else tag
+XHTML = '{http://www.w3.org/1999/xhtml}'
+BODY_TAG = XHTML + 'body'
+# ul/ol tag -> whether the list is ordered
+LIST_TAGS = {XHTML + 'ul': False, XHTML + 'ol': True}
+HEADING_LEVELS = {f'h{level}': level for level in range(1, 7)}
+
+# A list takes its section from the nearest heading among the elements just
+# before it in document order; farther headings leave it "Unknown"
+HEADING_LOOKBACK = 19
+
+# Item keywords checked only when the heading does not classify a list
+MEDICATION_KEYWORDS = ('mg', 'drops', 'topical', 'oral', 'injection')
+PROCEDURE_KEYWORDS = ('surgery', 'laser', 'repair', 'removal')
+
+# Bump when parse_chapter_lists changes what it returns, so stale caches are ignored
+PARSE_CACHE_VERSION = 1
+
+if HAVE_LXML:
+    # Drop comments/PIs like the stdlib parser does, so every child is an element
+    _ITERPARSE_OPTIONS = {'remove_comments': True, 'remove_pis': True, 'resolve_entities': False}
+    _find_list_items = ET.XPath('.//xhtml:li', namespaces=NS)
+
+    def get_text(elem) -> str:
+        """Extract all text from element."""
+        return ET.tostring(elem, method='text', encoding='unicode', with_tail=False).strip()
+else:
+    _ITERPARSE_OPTIONS = {}
 
-def get_text(elem) -> str:
-    """Extract all text from element."""
-    return ''.join(elem.itertext()).strip()
+    def _find_list_items(elem):
+        return elem.findall('.//xhtml:li', NS)
+
+    def get_text(elem) -> str:
+        """Extract all text from element."""
+        return ''.join(elem.itertext()).strip()
 
 def extract_list_items(list_elem) -> List[str]:
     """Extract items from ul/ol element."""
     items = []
-    for li in list_elem.findall('.//xhtml:li', NS):
+    for li in _find_list_items(list_elem):
         text = get_text(li)
         if text:
             items.append(text)
     return items
 
-def find_list_context(list_elem, body_elements: List) -> Dict[str, str]:
-    """Find the heading and context for a list."""
-    list_index = -1
-    for i, elem in enumerate(body_elements):
-        if elem == list_elem:
-            list_index = i
-            break
-
-    heading = "Unknown"
-    level = 0
+# Memo of full element tag -> heading level (0 for non-headings)
+_TAG_LEVELS: Dict[str, int] = {}
 
-    # Look backwards for nearest heading
-    if list_index > 0:
-        for i in range(list_index - 1, max(0, list_index - 20), -1):
-            elem = body_elements[i]
-            tag = get_tag(elem)
-            if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                heading = get_text(elem)
-                level = int(tag[1])
-                break
-
-    return {'heading': heading, 'level': level}
+def heading_level(tag: str) -> int:
+    """Heading level (1-6) for an element tag in any namespace, 0 otherwise."""
+    level = _TAG_LEVELS.get(tag)
+    if level is None:
+        level = _TAG_LEVELS[tag] = HEADING_LEVELS.get(tag.rpartition('}')[2], 0)
+    return level
 
 def classify_list_type(heading: str, items: List[str]) -> str:
     """Classify list based on heading and content."""
@@ -80,57 +109,150 @@ def classify_list_type(heading: str, items: List[str]) -> str:
     if 'exam' in heading_lower or 'finding' in heading_lower or 'evaluation' in heading_lower:
         return 'examination'
 
-    # Check items for medication/procedure indicators
+    # Check items for medication/procedure indicators; only reached when the
+    # heading matched none of the categories above
+    if not items:
+        return 'general'
     items_text = ' '.join(items).lower()
-    if any(med in items_text for med in ['mg', 'drops', 'topical', 'oral', 'injection']):
-        return 'medication'
-    if any(proc in items_text for proc in ['surgery', 'laser', 'repair', 'removal']):
-        return 'procedure'
+    for med in MEDICATION_KEYWORDS:
+        if med in items_text:
+            return 'medication'
+    for proc in PROCEDURE_KEYWORDS:
+        if proc in items_text:
+            return 'procedure'
 
     return 'general'
 
-def extract_lists_from_chapter(html_content: str, chapter_num: int, chapter_title: str) -> List[Dict]:
-    """Extract all lists from a chapter."""
-    root = ET.fromstring(html_content)
-    body = root.find('.//xhtml:body', NS)
+def parse_chapter_lists(html_content) -> List[Tuple[bool, str, int, List[str]]]:
+    """
+    Parse the lists of a chapter (XHTML as str, bytes or binary file object) in one streaming pass.
+
+    Returns (ordered, section heading, heading level, items) per list, in
+    list id order; classification is left to build_list_records.
+    """
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8')
+    source = io.BytesIO(html_content) if isinstance(html_content, bytes) else html_content
+
+    body = None
+    index = 0  # Position of the current element in body.iter() order
+    last_heading = None  # [index, text, level], text set once the heading is closed
+    open_headings = []
+    open_lists = []  # (index, context heading) per list still being parsed
+    found = []  # (ordered, index, context heading, items)
+
+    events = ET.iterparse(source, events=('start', 'end'), **_ITERPARSE_OPTIONS)
+    for event, elem in events:
+        if body is None:
+            if event == 'start' and elem.tag == BODY_TAG:
+                body = elem
+            continue
 
-    if body is None:
-        return []
+        tag = elem.tag
+        if event == 'start':
+            index += 1
+            if tag in LIST_TAGS:
+                nearest = last_heading if last_heading and last_heading[0] >= index - HEADING_LOOKBACK else None
+                open_lists.append((index, nearest))
+            else:
+                level = heading_level(tag)
+                if level:
+                    last_heading = [index, None, level]
+                    open_headings.append(last_heading)
+            continue
 
-    body_elements = list(body.iter())
-    lists = []
-    list_id = 0
+        if elem is body:
+            break
+        if tag in LIST_TAGS:
+            list_index, nearest = open_lists.pop()
+            items = extract_list_items(elem)
+            # Skip empty or very small lists
+            if len(items) >= 2:
+                found.append((LIST_TAGS[tag], list_index, nearest, items))
+        elif _TAG_LEVELS[tag]:
+            open_headings.pop()[1] = get_text(elem)
+
+        # Nothing outside an open list or heading is looked at again
+        if not open_lists and not open_headings:
+            elem.clear()
+            if HAVE_LXML:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
 
-    for elem in body.findall('.//xhtml:ul', NS) + body.findall('.//xhtml:ol', NS):
-        # Extract list items
-        items = extract_list_items(elem)
+    if body is None:
+        return []
 
-        # Skip empty or very small lists
-        if len(items) < 2:
-            continue
+    # All unordered lists first, then ordered ones; list ids follow this order
+    found.sort(key=lambda entry: (entry[0], entry[1]))
 
-        # Find context
-        context = find_list_context(elem, body_elements)
+    return [
+        (ordered, nearest[1], nearest[2], items) if nearest else (ordered, "Unknown", 0, items)
+        for ordered, _, nearest, items in found
+    ]
 
+def build_list_records(parsed_lists: List[Tuple[bool, str, int, List[str]]],
+                       chapter_num: int, chapter_title: str) -> List[Dict]:
+    """Classify parsed lists and build the output records of one chapter."""
+    lists = []
+    for list_id, (ordered, heading, level, items) in enumerate(parsed_lists):
         # Classify list type
-        list_type = classify_list_type(context['heading'], items)
+        list_type = classify_list_type(heading, items)
 
         lists.append({
             'list_id': f"ch{chapter_num}_list_{list_id}",
             'chapter_number': chapter_num,
             'chapter_title': chapter_title,
-            'section': context['heading'],
-            'heading_level': context['level'],
+            'section': heading,
+            'heading_level': level,
             'list_type': list_type,
-            'ordered': get_tag(elem) == 'ol',
+            'ordered': ordered,
             'items': items,
             'item_count': len(items)
         })
 
-        list_id += 1
-
     return lists
 
+def extract_lists_from_chapter(html_content, chapter_num: int, chapter_title: str) -> List[Dict]:
+    """Extract all lists from a chapter (XHTML as str, bytes or binary file object)."""
+    return build_list_records(parse_chapter_lists(html_content), chapter_num, chapter_title)
+
+def epub_digest(epub_path: Path) -> str:
+    """Short SHA-256 hex digest of the EPUB file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(epub_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def load_parse_cache(cache_file: Path) -> Dict[str, List]:
+    """Parsed lists per EPUB entry from an earlier run, or {} when unusable."""
+    try:
+        with open(cache_file, 'rb') as f:
+            version, parsed = pickle.load(f)
+        if version == PARSE_CACHE_VERSION:
+            return parsed
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+    return {}
+
+def save_parse_cache(cache_file: Path, parsed: Dict[str, List]):
+    """Write the parse cache atomically; a failed write only costs a re-parse."""
+    try:
+        tmp_file = cache_file.with_name(f"{cache_file.name}.tmp.{os.getpid()}")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((PARSE_CACHE_VERSION, parsed), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+def write_json(path: Path, obj: Any, ensure_ascii: bool = False):
+    """Write obj as indented JSON with orjson, unless ASCII escaping is needed."""
+    if orjson is not None and not ensure_ascii:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2, ensure_ascii=ensure_ascii)
+
 def main():
     base_dir = Path(__file__).parent.parent
     epub_path = base_dir / "data" / "The Wills Eye Manual - Kalla Gervasio.epub"
@@ -145,64 +267,72 @@ def main():
     with open(structure_file) as f:
         metadata = json.load(f)
 
-    # Extract EPUB content
+    # Parsed lists of earlier runs over the same EPUB are reused, so changes
+    # to classification do not require re-parsing
     print(f"\nExtracting from: {epub_path.name}")
-    epub_content = {}
-    with zipfile.ZipFile(epub_path) as epub:
-        for item in epub.namelist():
-            if item.endswith('.xhtml'):
-                epub_content[item] = epub.read(item).decode('utf-8')
+    cache_file = output_dir / f"wills_eye_lists_{epub_digest(epub_path)}.cache.pkl"
+    parse_cache = load_parse_cache(cache_file)
+    cache_hits = 0
+    epub = None
 
     # Extract lists from all chapters
     all_lists = []
+    type_distribution = Counter()
+    total_items = 0
     for meta in metadata:
         chapter_file = f"OEBPS/XHTML/{meta['file']}"
-        if chapter_file not in epub_content:
-            continue
+        parsed = parse_cache.get(chapter_file)
+        if parsed is not None:
+            cache_hits += 1
+        else:
+            # Parse chapters straight from the EPUB entry streams; only entries
+            # named in the metadata are decompressed, as the parser consumes them
+            if epub is None:
+                epub = zipfile.ZipFile(epub_path)
+            if not chapter_file.endswith('.xhtml') or chapter_file not in epub.NameToInfo:
+                continue
+            with epub.open(chapter_file) as fp:
+                parsed = parse_cache[chapter_file] = parse_chapter_lists(fp)
 
         print(f"\n📋 Chapter {meta['number']}: {meta['title']}")
-        lists = extract_lists_from_chapter(
-            epub_content[chapter_file],
-            meta['number'],
-            meta['title']
-        )
+        lists = build_list_records(parsed, meta['number'], meta['title'])
 
         print(f"   Found {len(lists)} list(s)")
 
         # Show type distribution
-        type_counts = {}
-        for lst in lists:
-            type_counts[lst['list_type']] = type_counts.get(lst['list_type'], 0) + 1
+        type_counts = Counter(lst['list_type'] for lst in lists)
 
         for list_type, count in sorted(type_counts.items()):
             print(f"     - {list_type}: {count}")
 
         all_lists.extend(lists)
+        type_distribution.update(type_counts)
+        total_items += sum(lst['item_count'] for lst in lists)
+
+    if epub is not None:
+        epub.close()
+        save_parse_cache(cache_file, parse_cache)
+    if cache_hits:
+        print(f"\n  Reused parsed lists of {cache_hits} chapter(s) from {cache_file.name}")
 
     # Save lists
     output_file = output_dir / "wills_eye_lists.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_lists, f, indent=2, ensure_ascii=False)
+    write_json(output_file, all_lists)
 
     print(f"\n✓ Saved: {output_file.name}")
     print(f"  Total lists extracted: {len(all_lists)}")
 
     # Generate report
-    type_distribution = {}
-    for lst in all_lists:
-        type_distribution[lst['list_type']] = type_distribution.get(lst['list_type'], 0) + 1
-
     report = {
         'phase': '1.3 - List Extraction',
         'total_lists': len(all_lists),
         'chapters_processed': len(metadata),
-        'type_distribution': type_distribution,
-        'avg_items_per_list': sum(lst['item_count'] for lst in all_lists) / len(all_lists) if all_lists else 0
+        'type_distribution': dict(type_distribution),
+        'avg_items_per_list': total_items / len(all_lists) if all_lists else 0
     }
 
     report_file = output_dir / "phase1_3_report.json"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2)
+    write_json(report_file, report, ensure_ascii=True)
 
     print(f"✓ Report: {report_file.name}")
     print("\n" + "=" * 60)
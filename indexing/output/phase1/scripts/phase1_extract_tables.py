@@ -9,7 +9,7 @@ Tables are found in chapters: 3, 4, 7, 9, 11, 12, 13, 14
 import json
 import zipfile
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from xml.etree import ElementTree as ET
 
 NS = {'xhtml': 'http://www.w3.org/1999/xhtml'}
@@ -69,31 +69,33 @@ def extract_table_data(table_elem) -> Dict[str, Any]:
         'rows': rows
     }
 
-def find_table_context(table_elem, body_elements: List) -> str:
-    """Find the nearest heading or context for a table."""
-    # Find the table's position in body
-    table_index = -1
-    for i, elem in enumerate(body_elements):
-        if elem == table_elem:
-            table_index = i
-            break
-
-    # Look backwards for nearest heading
-    if table_index > 0:
-        for i in range(table_index - 1, -1, -1):
-            elem = body_elements[i]
-            tag = get_tag(elem)
-            if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                return get_text(elem)
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+TABLE_TAG = '{http://www.w3.org/1999/xhtml}table'
 
-            # Also check divs for headings
-            if tag == 'div':
-                for child in elem:
-                    child_tag = get_tag(child)
-                    if child_tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                        return get_text(child)
+def find_table_contexts(body) -> List[Tuple[Any, Optional[Any]]]:
+    """
+    Pair every table in body with the element giving its context, in document order.
 
-    return "Unknown section"
+    The context is the nearest heading before the table, or the first heading
+    child of a div before it, whichever comes last; None when there is none.
+    A single pass over body keeps the latest one seen, so each table's context
+    is known when the table is reached.
+    """
+    tables = []
+    context_elem = None
+    for elem in body.iter():
+        tag = get_tag(elem)
+        if elem.tag == TABLE_TAG:
+            tables.append((elem, context_elem))
+        elif tag in HEADING_TAGS:
+            context_elem = elem
+        elif tag == 'div':
+            # Also check divs for headings
+            for child in elem:
+                if get_tag(child) in HEADING_TAGS:
+                    context_elem = child
+                    break
+    return tables
 
 def extract_tables_from_chapter(html_content: str, chapter_num: int, chapter_title: str) -> List[Dict]:
     """Extract all tables from a chapter."""
@@ -103,11 +105,10 @@ def extract_tables_from_chapter(html_content: str, chapter_num: int, chapter_tit
     if body is None:
         return []
 
-    body_elements = list(body.iter())
     tables = []
     table_id = 0
 
-    for elem in body.findall('.//xhtml:table', NS):
+    for elem, context_elem in find_table_contexts(body):
         # Extract table data
         table_data = extract_table_data(elem)
 
@@ -116,7 +117,7 @@ def extract_tables_from_chapter(html_content: str, chapter_num: int, chapter_tit
             continue
 
         # Find context/caption
-        context = find_table_context(elem, body_elements)
+        context = get_text(context_elem) if context_elem is not None else "Unknown section"
 
         # Look for caption element
         caption_elem = elem.find('.//xhtml:caption', NS)
@@ -5,10 +5,22 @@ import json
 import sys
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
 # Fix console encoding for Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+def load_json(path: Path):
+    """Load a JSON file, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
 def validate_phase1():
     base_dir = Path(__file__).parent.parent
     output_dir = base_dir / "indexing" / "output" / "phase1"
@@ -18,20 +30,11 @@ def validate_phase1():
     print("=" * 60)
 
     # Load all outputs
-    with open(output_dir / "wills_eye_chapters_structured.json", encoding='utf-8') as f:
-        chapters = json.load(f)
-
-    with open(output_dir / "wills_eye_text_blocks.json", encoding='utf-8') as f:
-        blocks = json.load(f)
-
-    with open(output_dir / "wills_eye_lists.json", encoding='utf-8') as f:
-        lists = json.load(f)
-
-    with open(output_dir / "wills_eye_tables.json", encoding='utf-8') as f:
-        tables = json.load(f)
-
-    with open(output_dir / "differential_diagnoses.json", encoding='utf-8') as f:
-        ddx = json.load(f)
+    chapters = load_json(output_dir / "wills_eye_chapters_structured.json")
+    blocks = load_json(output_dir / "wills_eye_text_blocks.json")
+    lists = load_json(output_dir / "wills_eye_lists.json")
+    tables = load_json(output_dir / "wills_eye_tables.json")
+    ddx = load_json(output_dir / "differential_diagnoses.json")
 
     # Validate
     checks = []
@@ -20,15 +20,33 @@ Output:
 Usage:
     .venv/bin/python indexing/output/phase2/scripts/phase2_compensate_risk_factors.py
     .venv/bin/python indexing/output/phase2/scripts/phase2_compensate_risk_factors.py --dry-run
+    .venv/bin/python indexing/output/phase2/scripts/phase2_compensate_risk_factors.py --workers 4
 """
 
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple
 from collections import defaultdict
 from dataclasses import dataclass, field
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
+try:
+    import re2
+except ImportError:  # optional, falls back to the stdlib re
+    re2 = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional, falls back to one substring check per disease
+    ahocorasick = None
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PHASE1_DIR = SCRIPT_DIR.parent.parent / "phase1"
@@ -46,6 +64,35 @@ RISK_PATTERNS = [
     r"(?:higher|greater) risk in\s+([^.;]+)",
 ]
 
+# Python's \s for str: the ASCII whitespace and separators plus Unicode Z*.
+# RE2's \s is ASCII only, so it is spelled out to keep matches identical.
+_RE2_WHITESPACE = r"\t\n\x0b\f\r\x1c-\x1f\x85\p{Z}"
+
+
+def compile_risk_pattern(pattern: str):
+    """Compile a case-insensitive risk pattern, with RE2 when it is installed."""
+    if re2 is None:
+        return re.compile(pattern, re.IGNORECASE)
+    pattern = pattern.replace("[:\\s]", f"[:{_RE2_WHITESPACE}]").replace("\\s", f"[{_RE2_WHITESPACE}]")
+    return re2.compile("(?i)" + pattern)
+
+
+# RE2 scans in linear time without backtracking; these patterns use no
+# backreferences or lookaround, so both engines find the same matches on
+# text without CASE_FOLD_OUTLIERS characters (see below)
+RISK_REGEXES = [compile_risk_pattern(pattern) for pattern in RISK_PATTERNS]
+# RE2's (?i) does not fold those characters to ASCII letters the way
+# re.IGNORECASE does, so text containing one is scanned with the stdlib
+STDLIB_RISK_REGEXES = (RISK_REGEXES if re2 is None
+                       else [re.compile(pattern, re.IGNORECASE) for pattern in RISK_PATTERNS])
+
+# Every risk pattern contains one of these words, so lowercased text without
+# any of them is not scanned. re.IGNORECASE also matches these characters to
+# letters of the words while lower() maps them elsewhere; text containing
+# one is always scanned.
+RISK_PATTERN_KEYWORDS = ("risk", "predispos", "associated with", "more common in")
+CASE_FOLD_OUTLIERS = ("\u017f", "\u0130", "\u0131")  # long s, dotted I, dotless i
+
 # Common risk factor categories
 RISK_CATEGORIES = {
     "demographic": ["age", "gender", "race", "ethnicity", "male", "female", "elderly", "pediatric"],
@@ -67,18 +114,22 @@ COMMON_RISK_FACTORS = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskFactorEntity:
-    """Represents a risk factor entity."""
+    """Represents a risk factor entity.
+
+    Diseases, chapters and sections are stored as sorted tuples of unique
+    values, built once when the entity is created.
+    """
     entity_id: str
     name: str
     name_normalized: str
     type: str = "risk_factor"
     category: str = "unclassified"
     mentions_count: int = 0
-    associated_diseases: List[str] = field(default_factory=list)
-    chapters: List[int] = field(default_factory=list)
-    sections: List[str] = field(default_factory=list)
+    associated_diseases: Tuple[str, ...] = ()
+    chapters: Tuple[int, ...] = ()
+    sections: Tuple[str, ...] = ()
     contexts: List[str] = field(default_factory=list)
     extraction_method: str = "pattern_matching"
 
@@ -90,9 +141,9 @@ class RiskFactorEntity:
             "type": self.type,
             "category": self.category,
             "mentions_count": self.mentions_count,
-            "associated_diseases": sorted(list(set(self.associated_diseases)))[:10],
-            "chapters": sorted(list(set(self.chapters))),
-            "sections": sorted(list(set(self.sections))),
+            "associated_diseases": self.associated_diseases[:10],
+            "chapters": self.chapters,
+            "sections": self.sections,
             "sample_contexts": self.contexts[:3],
             "metadata": {
                 "extraction_method": self.extraction_method,
@@ -108,6 +159,15 @@ def load_text_blocks() -> List[Dict]:
         return data if isinstance(data, list) else data.get("text_blocks", [])
 
 
+def write_json(path: Path, obj: Any, ensure_ascii: bool = False) -> None:
+    """Write obj as indented JSON with orjson, unless ASCII escaping is needed."""
+    if orjson is not None and not ensure_ascii:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=ensure_ascii)
+
+
 def load_diseases() -> List[Dict]:
     """Load existing disease entities to associate risk factors."""
     diseases_file = PHASE2_DIR / "diseases.json"
@@ -139,12 +199,54 @@ def classify_risk_factor(risk_text: str) -> str:
     return "unclassified"
 
 
-def extract_risk_factors_from_text(text: str, chapter: int, section: str, disease_name: str = "") -> Dict[str, Dict]:
+# (risk, lowercased, normalized name, display name) per common risk factor,
+# computed once instead of on every match
+COMMON_RISK_TABLE = [
+    (risk, risk.lower(), normalize_risk_factor_name(risk), risk.title())
+    for risk in COMMON_RISK_FACTORS
+]
+
+
+def may_mention_risk_factors(text: str, text_lower: str, section: str) -> bool:
+    """
+    Cheap check whether extract_risk_factors_from_text can find anything in a
+    block: a risk factors section, a risk pattern keyword or a common risk
+    factor. False means the block yields no mentions.
+    """
+    if section and ("risk" in section.lower() or "predispos" in section.lower()):
+        return True
+    if any(keyword in text_lower for keyword in RISK_PATTERN_KEYWORDS):
+        return True
+    if any(char in text for char in CASE_FOLD_OUTLIERS):
+        return True
+    return any(common_risk_lower in text_lower for _, common_risk_lower, _, _ in COMMON_RISK_TABLE)
+
+
+def extract_risk_factors_from_text(text: str, chapter: int, section: str, disease_name: str,
+                                   all_risks: Dict[str, Dict], text_lower: Optional[str] = None):
     """
-    Extract risk factors from text using patterns.
-    Returns dict: {normalized_name: {name, category, mentions, contexts, etc.}}
+    Extract risk factors from text using patterns, accumulating into all_risks.
+    all_risks maps normalized_name -> {name, category, mentions, contexts, etc.}
+    and must create missing entries on access (a defaultdict). Callers that
+    already lowercased the text pass it as text_lower.
     """
-    found_risks = {}
+    seen = set()  # normalized names already found in this block
+
+    def add_mention(normalized: str, name: str, risk: str) -> Dict:
+        entry = all_risks[normalized]
+        if not entry["name"]:
+            entry["name"] = name
+        # A block contributes the category of its first mention of a risk
+        if normalized not in seen:
+            seen.add(normalized)
+            if entry["category"] == "unclassified":
+                entry["category"] = classify_risk_factor(risk)
+        entry["mentions"] += 1
+        entry["chapter_mask"] |= 1 << chapter
+        entry["sections"].add(section)
+        if disease_name:
+            entry["associated_diseases"].append(disease_name)
+        return entry
 
     # Check if this is a risk factor section
     is_risk_section = any(keyword in section.lower() for keyword in ["risk", "predispos"]) if section else False
@@ -157,29 +259,22 @@ def extract_risk_factors_from_text(text: str, chapter: int, section: str, diseas
         for risk in potential_risks[:15]:  # Limit to avoid noise
             risk = risk.strip()
             if 5 < len(risk) < 100:
-                normalized = normalize_risk_factor_name(risk)
-
-                if normalized not in found_risks:
-                    found_risks[normalized] = {
-                        "name": risk[:80],
-                        "category": classify_risk_factor(risk),
-                        "mentions": 0,
-                        "associated_diseases": [],
-                        "chapters": set(),
-                        "sections": set(),
-                        "contexts": []
-                    }
-
-                found_risks[normalized]["mentions"] += 1
-                found_risks[normalized]["chapters"].add(chapter)
-                found_risks[normalized]["sections"].add(section)
-                if disease_name:
-                    found_risks[normalized]["associated_diseases"].append(disease_name)
-                found_risks[normalized]["contexts"].append(f"[Risk factors section] {risk[:80]}")
-
-    # Pattern-based extraction
-    for pattern in RISK_PATTERNS:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
+                entry = add_mention(normalize_risk_factor_name(risk), risk[:80], risk)
+                if len(entry["contexts"]) < 5:
+                    entry["contexts"].append(f"[Risk factors section] {risk[:80]}")
+
+    if text_lower is None:
+        text_lower = text.lower()
+
+    # Pattern-based extraction, skipped when no pattern can match
+    if any(char in text for char in CASE_FOLD_OUTLIERS):
+        regexes = STDLIB_RISK_REGEXES
+    elif any(keyword in text_lower for keyword in RISK_PATTERN_KEYWORDS):
+        regexes = RISK_REGEXES
+    else:
+        regexes = ()
+    for regex in regexes:
+        matches = regex.finditer(text)
 
         for match in matches:
             risk = match.group(1).strip()
@@ -192,55 +287,115 @@ def extract_risk_factors_from_text(text: str, chapter: int, section: str, diseas
             # Remove trailing conjunctions
             risk = re.sub(r'\s+(and|or|with|in|at|such as)$', '', risk, flags=re.IGNORECASE)
 
-            normalized = normalize_risk_factor_name(risk)
-
-            if normalized not in found_risks:
-                found_risks[normalized] = {
-                    "name": risk.title(),
-                    "category": classify_risk_factor(risk),
-                    "mentions": 0,
-                    "associated_diseases": [],
-                    "chapters": set(),
-                    "sections": set(),
-                    "contexts": []
-                }
-
-            found_risks[normalized]["mentions"] += 1
-            found_risks[normalized]["chapters"].add(chapter)
-            found_risks[normalized]["sections"].add(section)
-            if disease_name:
-                found_risks[normalized]["associated_diseases"].append(disease_name)
+            entry = add_mention(normalize_risk_factor_name(risk), risk.title(), risk)
 
             # Extract context
-            if len(found_risks[normalized]["contexts"]) < 5:
+            if len(entry["contexts"]) < 5:
                 start = max(0, match.start() - 40)
                 end = min(len(text), match.end() + 60)
                 context = text[start:end].replace("\n", " ").strip()
-                found_risks[normalized]["contexts"].append(f"...{context}...")
+                entry["contexts"].append(f"...{context}...")
 
-    # Check for common predefined risk factors
-    for common_risk in COMMON_RISK_FACTORS:
-        if common_risk.lower() in text.lower():
-            normalized = normalize_risk_factor_name(common_risk)
+    # Check for common predefined risk factors against one lowercased copy
+    for common_risk, common_risk_lower, normalized, name in COMMON_RISK_TABLE:
+        if common_risk_lower in text_lower:
+            add_mention(normalized, name, common_risk)
 
-            if normalized not in found_risks:
-                found_risks[normalized] = {
-                    "name": common_risk.title(),
-                    "category": classify_risk_factor(common_risk),
-                    "mentions": 0,
-                    "associated_diseases": [],
-                    "chapters": set(),
-                    "sections": set(),
-                    "contexts": []
-                }
 
-            found_risks[normalized]["mentions"] += 1
-            found_risks[normalized]["chapters"].add(chapter)
-            found_risks[normalized]["sections"].add(section)
-            if disease_name:
-                found_risks[normalized]["associated_diseases"].append(disease_name)
+def new_risk_entry() -> Dict:
+    """Empty accumulator entry for one normalized risk factor."""
+    return {
+        "name": "",
+        "category": "unclassified",
+        "mentions": 0,
+        "associated_diseases": [],
+        "chapter_mask": 0,  # bit n set when chapter n mentions the risk
+        "sections": set(),
+        "contexts": []
+    }
+
 
-    return found_risks
+def build_disease_finder(disease_names: Dict[str, str]):
+    """
+    Build a function returning the first disease, in disease_names order, whose
+    lowercased name occurs in a lowercased text ("" when none does). All names
+    are matched in one Aho-Corasick pass over the text.
+    """
+    automaton = ahocorasick.Automaton()
+    no_match = (len(disease_names), "")
+    for rank, (disease_lower, disease_proper) in enumerate(disease_names.items()):
+        if disease_lower:
+            automaton.add_word(disease_lower, (rank, disease_proper))
+        else:
+            # An empty name is contained in every text
+            no_match = (rank, disease_proper)
+
+    if len(automaton) == 0:
+        return lambda text_lower: no_match[1]
+    automaton.make_automaton()
+
+    def find_disease(text_lower: str) -> str:
+        best = no_match
+        for _, hit in automaton.iter(text_lower):
+            if hit < best:
+                best = hit
+        return best[1]
+
+    return find_disease
+
+
+def scan_blocks(text_blocks: List[Dict], disease_names: Dict[str, str]) -> Dict[str, Dict]:
+    """Extract risk factors from a run of text blocks into a fresh accumulator."""
+    all_risks = defaultdict(new_risk_entry)
+    find_disease = build_disease_finder(disease_names) if ahocorasick is not None else None
+
+    for block in text_blocks:
+        text = block.get("text", "")
+        chapter = block.get("chapter_number", 0)
+        section = block.get("section_title", "")
+
+        if not text or len(text.strip()) < 30:
+            continue
+
+        # Most blocks mention no risk factor; skip them before the disease lookup
+        text_lower = text.lower()
+        if not may_mention_risk_factors(text, text_lower, section):
+            continue
+
+        # Try to determine associated disease
+        disease_name = ""
+        head_lower = text_lower[:200]
+        if find_disease is not None:
+            disease_name = find_disease(head_lower)
+        else:
+            for disease_lower, disease_proper in disease_names.items():
+                if disease_lower in head_lower:
+                    disease_name = disease_proper
+                    break
+
+        extract_risk_factors_from_text(text, chapter, section, disease_name, all_risks, text_lower)
+
+    return all_risks
+
+
+def merge_risks(all_risks: Dict[str, Dict], later: Dict[str, Dict]):
+    """Fold the accumulator of a later run of blocks into all_risks."""
+    for normalized, data in later.items():
+        entry = all_risks[normalized]
+        if not entry["name"]:
+            entry["name"] = data["name"]
+        if entry["category"] == "unclassified":
+            entry["category"] = data["category"]
+        entry["mentions"] += data["mentions"]
+        entry["associated_diseases"].extend(data["associated_diseases"])
+        entry["chapter_mask"] |= data["chapter_mask"]
+        entry["sections"].update(data["sections"])
+        entry["contexts"].extend(data["contexts"][:max(0, 5 - len(entry["contexts"]))])
+
+
+def chapters_from_mask(chapter_mask: int) -> Tuple[int, ...]:
+    """Sorted chapter numbers whose bits are set in chapter_mask."""
+    return tuple(chapter for chapter in range(chapter_mask.bit_length()) if chapter_mask >> chapter & 1)
 
 
 def create_entity_id(index: int) -> str:
@@ -254,6 +409,8 @@ def main():
 
     parser = argparse.ArgumentParser(description="Extract RISK_FACTOR entities (baseline)")
     parser.add_argument("--dry-run", action="store_true", help="Preview without saving")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Scan text blocks in this many processes (default: 1)")
     args = parser.parse_args()
 
     print("=" * 80)
@@ -276,44 +433,17 @@ def main():
 
     # Extract risk factors
     print("\n[2/4] Extracting risk factor entities...")
-    all_risks = defaultdict(lambda: {
-        "name": "",
-        "category": "unclassified",
-        "mentions": 0,
-        "associated_diseases": [],
-        "chapters": set(),
-        "sections": set(),
-        "contexts": []
-    })
-
-    for block in text_blocks:
-        text = block.get("text", "")
-        chapter = block.get("chapter_number", 0)
-        section = block.get("section_title", "")
-
-        if not text or len(text.strip()) < 30:
-            continue
-
-        # Try to determine associated disease
-        disease_name = ""
-        for disease_lower, disease_proper in disease_names.items():
-            if disease_lower in text.lower()[:200]:
-                disease_name = disease_proper
-                break
-
-        block_risks = extract_risk_factors_from_text(text, chapter, section, disease_name)
-
-        # Merge findings
-        for normalized, data in block_risks.items():
-            if not all_risks[normalized]["name"]:
-                all_risks[normalized]["name"] = data["name"]
-            if all_risks[normalized]["category"] == "unclassified":
-                all_risks[normalized]["category"] = data["category"]
-            all_risks[normalized]["mentions"] += data["mentions"]
-            all_risks[normalized]["associated_diseases"].extend(data["associated_diseases"])
-            all_risks[normalized]["chapters"].update(data["chapters"])
-            all_risks[normalized]["sections"].update(data["sections"])
-            all_risks[normalized]["contexts"].extend(data["contexts"])
+    workers = max(1, args.workers)
+    if workers == 1:
+        all_risks = scan_blocks(text_blocks, disease_names)
+    else:
+        # Contiguous chunks merged back in order, so first mentions still win
+        chunk_size = max(1, -(-len(text_blocks) // workers))
+        chunks = [text_blocks[i:i + chunk_size] for i in range(0, len(text_blocks), chunk_size)]
+        all_risks = defaultdict(new_risk_entry)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_risks in pool.map(scan_blocks, chunks, repeat(disease_names)):
+                merge_risks(all_risks, chunk_risks)
 
     print(f"  ✓ Found {len(all_risks)} unique risk factor entities")
 
@@ -327,9 +457,9 @@ def main():
             name_normalized=normalized,
             category=data["category"],
             mentions_count=data["mentions"],
-            associated_diseases=data["associated_diseases"],
-            chapters=list(data["chapters"]),
-            sections=list(data["sections"]),
+            associated_diseases=tuple(sorted(set(data["associated_diseases"]))),
+            chapters=chapters_from_mask(data["chapter_mask"]),
+            sections=tuple(sorted(data["sections"])),
             contexts=data["contexts"][:3]
         )
         entities.append(entity)
@@ -337,14 +467,15 @@ def main():
     # Sort by mention count
     entities.sort(key=lambda e: e.mentions_count, reverse=True)
 
-    # Re-assign IDs
+    # Re-assign IDs, collecting stats in the same pass
+    category_counts = defaultdict(int)
+    total_mentions = 0
     for idx, entity in enumerate(entities, 1):
         entity.entity_id = create_entity_id(idx)
+        category_counts[entity.category] += 1
+        total_mentions += entity.mentions_count
 
     # Show stats
-    category_counts = defaultdict(int)
-    for entity in entities:
-        category_counts[entity.category] += 1
 
     print(f"  ✓ Created {len(entities)} entities")
     print(f"\n  By category:")
@@ -362,15 +493,14 @@ def main():
     print("\n[4/4] Saving entities...")
     entities_json = [e.to_dict() for e in entities]
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(entities_json, f, indent=2, ensure_ascii=False)
+    write_json(OUTPUT_FILE, entities_json)
     print(f"  ✓ Saved {len(entities)} entities to {OUTPUT_FILE}")
 
     # Generate report
     report = {
         "extraction_method": "baseline_pattern_matching",
         "total_entities": len(entities),
-        "total_mentions": sum(e.mentions_count for e in entities),
+        "total_mentions": total_mentions,
         "by_category": dict(category_counts),
         "patterns_used": len(RISK_PATTERNS),
         "top_entities": [
@@ -378,14 +508,13 @@ def main():
                 "name": e.name,
                 "category": e.category,
                 "mentions": e.mentions_count,
-                "associated_diseases_count": len(set(e.associated_diseases))
+                "associated_diseases_count": len(e.associated_diseases)
             }
             for e in entities[:15]
         ]
     }
 
-    with open(REPORT_FILE, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2)
+    write_json(REPORT_FILE, report, ensure_ascii=True)
     print(f"  ✓ Saved report to {REPORT_FILE}")
 
     # Summary
@@ -393,7 +522,7 @@ def main():
     print("EXTRACTION SUMMARY")
     print("=" * 80)
     print(f"Total Entities: {len(entities)}")
-    print(f"Total Mentions: {sum(e.mentions_count for e in entities):,}")
+    print(f"Total Mentions: {total_mentions:,}")
     print(f"Most common category: {max(category_counts, key=category_counts.get) if category_counts else 'N/A'}")
     print("=" * 80)
 
@@ -6,8 +6,10 @@ This script extracts all medical entities from The Wills Eye Manual using Claude
 for high accuracy. Supports 13 entity types aligned with the knowledge graph schema.
 
 Features:
-- PARALLEL PROCESSING: Uses ThreadPoolExecutor for concurrent API calls (default: 10 workers)
+- CONCURRENT REQUESTS: Uses asyncio with the async OpenAI client for concurrent API calls (default: 10 in flight)
+- BATCHED PROMPTS: Packs several text blocks into one API call (default: 8 blocks) so the instructions are sent once per batch
 - CHECKPOINT SUPPORT: Saves progress every 10 blocks and can resume from interruptions
+- RESPONSE CACHE: Keeps the LLM response of every block on disk, so re-runs only query changed blocks
 - ENTITY TYPES: Diseases, Symptoms, Signs, Treatments, Medications, Procedures, Anatomy, Etiology, Risk Factors, Differentials, Complications, Lab Tests, Imaging
 - CONFIDENCE SCORING: LLM assigns confidence to each extracted entity
 - BATCH DEDUPLICATION: Removes duplicates and keeps highest confidence versions
@@ -33,6 +35,7 @@ Output:
 - phase2_llm_report.json (extraction statistics, costs, and error counts)
 - phase2_checkpoint.json (progress checkpoint for resuming)
 - phase2_failed_blocks.json (blocks that failed after 3 retry attempts - requires manual handling)
+- phase2_llm_responses.cache.sqlite (LLM responses per block text, reused by later runs)
 
 Usage:
     # Full extraction with parallel processing (will resume from checkpoint if interrupted)
@@ -44,6 +47,12 @@ Usage:
     # Start fresh (ignore checkpoint)
     .venv/bin/python indexing/phase2_llm_entity_extraction.py --no-checkpoint
 
+    # Query the LLM for every block, even when a cached response exists
+    .venv/bin/python indexing/phase2_llm_entity_extraction.py --no-cache
+
+    # One text block per API call
+    .venv/bin/python indexing/phase2_llm_entity_extraction.py --batch-size 1
+
     # Test with limited blocks (useful for development)
     .venv/bin/python indexing/phase2_llm_entity_extraction.py --max-blocks 50 --num-workers 2
 
@@ -52,24 +61,24 @@ Usage:
 
 Error Handling:
 - API errors: Automatic retry with exponential backoff (3 attempts)
-- JSON errors: Automatic retry with exponential backoff (3 attempts)
+- JSON errors: Automatic retry with exponential backoff (3 attempts); a batch whose response does not fit the schema is split in halves
 - Validation errors: Invalid entities are filtered out, valid entities are kept
 - Failed blocks: After 3 attempts, blocks are saved to phase2_failed_blocks.json for manual review
 - Checkpoint: Progress is saved every 10 blocks and can resume from interruptions
 """
 
+import asyncio
+import hashlib
 import json
 import os
 import argparse
+import sqlite3
 from pathlib import Path
 from typing import List, Dict, Tuple, Set, Optional
-from dataclasses import dataclass, field
-from openai import OpenAI
+from dataclasses import asdict, dataclass, field
+from openai import AsyncOpenAI
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 from collections import defaultdict
-import time
 from datetime import datetime
 
 # Paths
@@ -92,10 +101,10 @@ os.environ.pop("https_proxy", None)
 os.environ.pop("ALL_PROXY", None)
 os.environ.pop("all_proxy", None)
 
-client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=None)
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=None)
 
-# Thread-safe lock for stats updates
-stats_lock = threading.Lock()
+# Requests run as coroutines on one event loop thread and the stats are only
+# updated between awaits, so the updates need no lock
 
 
 @dataclass
@@ -111,6 +120,7 @@ class ExtractionStats:
     json_errors: int = 0
     validation_errors: int = 0
     retry_count: int = 0
+    cache_hits: int = 0
     by_type: Dict[str, int] = field(default_factory=lambda: {
         'disease': 0,
         'symptom': 0,
@@ -201,6 +211,75 @@ ENTITY_EXTRACTION_SCHEMA = {
     "additionalProperties": False
 }
 
+# Several text blocks per request: the instructions above are sent once per
+# batch, and entities come back grouped by the block's position in the batch
+ENTITY_EXTRACTION_BATCH_PROMPT = ENTITY_EXTRACTION_PROMPT.rsplit("**Text to analyze:**", 1)[0] + """**Texts to analyze:**
+Each text starts with a "### BLOCK <n>" line. Extract the entities of every block separately and report them with that block's number as block_index.
+
+{texts}"""
+
+BATCH_ENTITY_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "block_index": {
+                        "type": "integer",
+                        "description": "Number of the block from its ### BLOCK line"
+                    },
+                    "entities": ENTITY_EXTRACTION_SCHEMA["properties"]["entities"]
+                },
+                "required": ["block_index", "entities"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False
+}
+
+MAX_BLOCK_CHARS = 3000  # Text of a block sent to the LLM
+MAX_TOKENS_PER_BLOCK = 2000  # Completion budget per block in a request
+# Output limit of the model; OpenAI-compatible providers reject larger
+# max_tokens values with a 400, so batch budgets are capped at it
+MAX_COMPLETION_TOKENS = int(os.environ.get("OPENAI_MAX_COMPLETION_TOKENS", "8192"))
+
+# Part of the response cache key; bump whenever the prompts or schemas above
+# change so cached responses of the old prompt are not reused
+PROMPT_VERSION = "v1"
+
+RESPONSE_CACHE_FILE = PHASE2_DIR / "phase2_llm_responses.cache.sqlite"
+
+
+class ResponseCache:
+    """
+    Entities the LLM returned per block text, kept in SQLite across runs.
+
+    Keys hash the model, PROMPT_VERSION and the block text sent to the LLM;
+    values are the raw entity lists as JSON, validated again on every hit.
+    """
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(path, isolation_level=None)  # autocommit
+        self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, entities TEXT NOT NULL)")
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(f"{OPENAI_MODEL_NAME}|{PROMPT_VERSION}|{text[:MAX_BLOCK_CHARS]}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[Dict]]:
+        row = self.conn.execute("SELECT entities FROM responses WHERE key = ?", (self.key(text),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, text: str, entities_json: str):
+        self.conn.execute("INSERT OR REPLACE INTO responses (key, entities) VALUES (?, ?)", (self.key(text), entities_json))
+
+    def close(self):
+        self.conn.close()
+
 
 def load_text_blocks() -> List[Dict]:
     """Load Phase 1 text blocks."""
@@ -248,11 +327,99 @@ def validate_entity(entity: Dict) -> Tuple[bool, Optional[str]]:
     return True, None
 
 
-def extract_entities_with_llm(
+def record_usage(stats: ExtractionStats, response, attempt: int):
+    """Add the token usage and cost of one LLM response to the stats."""
+    stats.llm_calls += 1
+    if attempt > 0:
+        stats.retry_count += 1
+    stats.total_tokens += response.usage.prompt_tokens + response.usage.completion_tokens
+
+    # Cost calculation (GPT-4o pricing: $5/1M input, $15/1M output)
+    input_cost = response.usage.prompt_tokens * 5 / 1000000
+    output_cost = response.usage.completion_tokens * 15 / 1000000
+    stats.total_cost += input_cost + output_cost
+
+
+def validate_block_entities(
+    entities: List[Dict],
+    text_block: Dict,
+    stats: ExtractionStats,
+    block_index: int,
+    attempt: int
+) -> Tuple[List[Dict], Optional[FailedBlock]]:
+    """
+    Validate the entities the LLM returned for one text block and attach block metadata.
+
+    Returns:
+        Tuple of (valid_entities, failed_block_info)
+    """
+    chapter = text_block.get("chapter_number")
+    section = text_block.get("section_path", "")
+
+    valid_entities = []
+    validation_errors = []
+
+    for entity in entities:
+        is_valid, error_msg = validate_entity(entity)
+        if is_valid:
+            # Add metadata to valid entity
+            entity["metadata"] = {
+                "chapter": chapter,
+                "section": section,
+                "extraction_method": "llm",
+                "model": OPENAI_MODEL_NAME,
+                "block_index": block_index
+            }
+
+            # Update stats by type
+            entity_type = entity.get("type", "").lower()
+            if entity_type in stats.by_type:
+                stats.by_type[entity_type] += 1
+
+            valid_entities.append(entity)
+        else:
+            validation_errors.append({
+                "entity": entity,
+                "error": error_msg
+            })
+            stats.validation_errors += 1
+
+    # If we have validation errors but also some valid entities, log but continue
+    if validation_errors and valid_entities:
+        print(f"  ⚠ Block {block_index}: {len(validation_errors)} validation errors, {len(valid_entities)} valid entities")
+
+    # If all entities failed validation, record as failed block
+    if entities and not valid_entities:
+        failed = FailedBlock(
+            block_index=block_index,
+            chapter_number=chapter,
+            section_path=section,
+            text_preview=text_block.get("text", "")[:200],
+            error_type="validation_error",
+            error_message=f"All {len(entities)} entities failed validation",
+            timestamp=datetime.now().isoformat(),
+            retry_count=attempt + 1,
+            raw_response=json.dumps({"entities": entities, "validation_errors": validation_errors}, indent=2)
+        )
+        return [], failed
+
+    stats.entities_extracted += len(valid_entities)
+
+    return valid_entities, None
+
+
+def is_extractable(text_block: Dict) -> bool:
+    """Whether a text block is long enough to send to the LLM."""
+    text = text_block.get("text", "")
+    return bool(text) and len(text.strip()) >= 50
+
+
+async def extract_entities_with_llm(
     text_block: Dict,
     stats: ExtractionStats,
     block_index: int,
-    max_retries: int = 3
+    max_retries: int = 3,
+    cache: Optional[ResponseCache] = None
 ) -> Tuple[List[Dict], Optional[FailedBlock]]:
     """
     Use LLM to extract entities from a text block with retry logic.
@@ -260,12 +427,18 @@ def extract_entities_with_llm(
     Returns:
         Tuple of (extracted_entities, failed_block_info)
     """
-    text = text_block.get("text", "")
-    if not text or len(text.strip()) < 50:  # Skip very short blocks
+    if not is_extractable(text_block):  # Skip very short blocks
         return [], None
 
+    text = text_block["text"]
+    if cache is not None:
+        cached_entities = cache.get(text)
+        if cached_entities is not None:
+            stats.cache_hits += 1
+            return validate_block_entities(cached_entities, text_block, stats, block_index, 0)
+
     # Prepare prompt
-    prompt = ENTITY_EXTRACTION_PROMPT.format(text=text[:3000])  # Limit text length
+    prompt = ENTITY_EXTRACTION_PROMPT.format(text=text[:MAX_BLOCK_CHARS])  # Limit text length
 
     chapter = text_block.get("chapter_number")
     section = text_block.get("section_path", "")
@@ -273,9 +446,9 @@ def extract_entities_with_llm(
     for attempt in range(max_retries):
         try:
             # Call OpenAI with structured output
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=OPENAI_MODEL_NAME,
-                max_tokens=2000,
+                max_tokens=MAX_TOKENS_PER_BLOCK,
                 temperature=0.0,  # Deterministic for consistency
                 messages=[{
                     "role": "user",
@@ -293,16 +466,7 @@ def extract_entities_with_llm(
             )
 
             # Update stats
-            with stats_lock:
-                stats.llm_calls += 1
-                if attempt > 0:
-                    stats.retry_count += 1
-                stats.total_tokens += response.usage.prompt_tokens + response.usage.completion_tokens
-
-                # Cost calculation (GPT-4o pricing: $5/1M input, $15/1M output)
-                input_cost = response.usage.prompt_tokens * 5 / 1000000
-                output_cost = response.usage.completion_tokens * 15 / 1000000
-                stats.total_cost += input_cost + output_cost
+            record_usage(stats, response, attempt)
 
             # Parse response (structured output returns valid JSON directly)
             response_text = response.choices[0].message.content.strip()
@@ -311,11 +475,10 @@ def extract_entities_with_llm(
                 result = json.loads(response_text)
             except json.JSONDecodeError as e:
                 # JSON parse error - retry
-                with stats_lock:
-                    stats.json_errors += 1
+                stats.json_errors += 1
 
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
                     continue
                 else:
                     # Final attempt failed - record failure
@@ -333,71 +496,21 @@ def extract_entities_with_llm(
                     return [], failed
 
             entities = result.get("entities", [])
-
-            # Validate each entity
-            valid_entities = []
-            validation_errors = []
-
-            for entity in entities:
-                is_valid, error_msg = validate_entity(entity)
-                if is_valid:
-                    # Add metadata to valid entity
-                    entity["metadata"] = {
-                        "chapter": chapter,
-                        "section": section,
-                        "extraction_method": "llm",
-                        "model": OPENAI_MODEL_NAME,
-                        "block_index": block_index
-                    }
-
-                    # Update stats by type
-                    entity_type = entity.get("type", "").lower()
-                    if entity_type in stats.by_type:
-                        with stats_lock:
-                            stats.by_type[entity_type] += 1
-
-                    valid_entities.append(entity)
-                else:
-                    validation_errors.append({
-                        "entity": entity,
-                        "error": error_msg
-                    })
-                    with stats_lock:
-                        stats.validation_errors += 1
-
-            # If we have validation errors but also some valid entities, log but continue
-            if validation_errors and valid_entities:
-                print(f"  ⚠ Block {block_index}: {len(validation_errors)} validation errors, {len(valid_entities)} valid entities")
-
-            # If all entities failed validation, record as failed block
-            if entities and not valid_entities:
-                failed = FailedBlock(
-                    block_index=block_index,
-                    chapter_number=chapter,
-                    section_path=section,
-                    text_preview=text[:200],
-                    error_type="validation_error",
-                    error_message=f"All {len(entities)} entities failed validation",
-                    timestamp=datetime.now().isoformat(),
-                    retry_count=attempt + 1,
-                    raw_response=json.dumps({"entities": entities, "validation_errors": validation_errors}, indent=2)
-                )
-                return [], failed
-
-            with stats_lock:
-                stats.entities_extracted += len(valid_entities)
-
-            return valid_entities, None
+            entities_json = json.dumps(entities) if cache is not None else None
+            valid_entities, failed = validate_block_entities(entities, text_block, stats, block_index, attempt)
+            # Responses whose entities all failed validation are asked for again next run
+            if cache is not None and failed is None:
+                cache.put(text, entities_json)
+            return valid_entities, failed
 
         except Exception as e:
             # API error or other exception - retry
             error_type = type(e).__name__
-            with stats_lock:
-                stats.api_errors += 1
+            stats.api_errors += 1
 
             if attempt < max_retries - 1:
                 print(f"  ⚠ Block {block_index}: {error_type} (attempt {attempt + 1}/{max_retries}), retrying...")
-                time.sleep(2 ** attempt)  # Exponential backoff
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 continue
             else:
                 # Final attempt failed - record failure
@@ -418,14 +531,154 @@ def extract_entities_with_llm(
     return [], None
 
 
-def process_block_parallel(
-    block: Dict,
+def build_batch_prompt(batch: List[Tuple[int, Dict]]) -> str:
+    """Pack several text blocks into one prompt, each under a numbered delimiter."""
+    texts = "\n".join(
+        f"### BLOCK {position}\n{text_block['text'][:MAX_BLOCK_CHARS]}"
+        for position, (_, text_block) in enumerate(batch)
+    )
+    return ENTITY_EXTRACTION_BATCH_PROMPT.format(texts=texts)
+
+
+async def extract_entities_batch(
+    batch: List[Tuple[int, Dict]],
     stats: ExtractionStats,
-    block_index: int
-) -> Tuple[List[Dict], Optional[FailedBlock]]:
-    """Process a single block and return extracted entities and any failures."""
-    entities, failed = extract_entities_with_llm(block, stats, block_index)
-    return entities, failed
+    max_retries: int = 3,
+    cache: Optional[ResponseCache] = None
+) -> Tuple[List[Dict], List[FailedBlock]]:
+    """
+    Use one LLM call to extract entities from several (block_index, text_block) pairs.
+
+    The instruction prompt is sent once for the whole batch. A response that
+    does not fit the batch schema splits the batch in halves, down to single
+    blocks; API errors that persist after retries fall back to one call per
+    block so failures are recorded per block.
+
+    Returns:
+        Tuple of (extracted_entities, failed_blocks_info)
+    """
+    batch = [(block_index, text_block) for block_index, text_block in batch if is_extractable(text_block)]
+
+    # Blocks with a cached response are not sent again
+    cached_entities = []
+    cached_failed = []
+    if cache is not None:
+        uncached = []
+        for block_index, text_block in batch:
+            entities = cache.get(text_block["text"])
+            if entities is None:
+                uncached.append((block_index, text_block))
+                continue
+            stats.cache_hits += 1
+            entities, failed = validate_block_entities(entities, text_block, stats, block_index, 0)
+            cached_entities.extend(entities)
+            if failed:
+                cached_failed.append(failed)
+        batch = uncached
+
+    entities, failed_blocks = await extract_uncached_batch(batch, stats, max_retries, cache)
+    return cached_entities + entities, cached_failed + failed_blocks
+
+
+async def extract_uncached_batch(
+    batch: List[Tuple[int, Dict]],
+    stats: ExtractionStats,
+    max_retries: int,
+    cache: Optional[ResponseCache]
+) -> Tuple[List[Dict], List[FailedBlock]]:
+    """Send extractable, uncached (block_index, text_block) pairs to the LLM in one call."""
+    if len(batch) <= 1:
+        return await extract_blocks_individually(batch, stats, max_retries, cache)
+
+    prompt = build_batch_prompt(batch)
+
+    for attempt in range(max_retries):
+        try:
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL_NAME,
+                max_tokens=min(MAX_TOKENS_PER_BLOCK * len(batch), MAX_COMPLETION_TOKENS),
+                temperature=0.0,  # Deterministic for consistency
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "batch_entity_extraction",
+                        "strict": True,
+                        "schema": BATCH_ENTITY_EXTRACTION_SCHEMA
+                    }
+                },
+                timeout=60.0 * len(batch)
+            )
+        except Exception as e:
+            error_type = type(e).__name__
+            stats.api_errors += 1
+
+            if attempt < max_retries - 1:
+                print(f"  ⚠ Blocks {batch[0][0]}-{batch[-1][0]}: {error_type} (attempt {attempt + 1}/{max_retries}), retrying...")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                continue
+            return await extract_blocks_individually(batch, stats, max_retries, cache)
+
+        record_usage(stats, response, attempt)
+
+        # Entities per batch position; positions outside the batch are ignored
+        entities_by_position = {}
+        try:
+            result = json.loads(response.choices[0].message.content.strip())
+            for block_result in result["results"]:
+                position = block_result["block_index"]
+                if isinstance(position, int) and 0 <= position < len(batch):
+                    entities_by_position.setdefault(position, []).extend(block_result["entities"])
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            # Temperature 0 makes a retry at the same size unlikely to help
+            stats.json_errors += 1
+            middle = len(batch) // 2
+            first_entities, first_failed = await extract_uncached_batch(batch[:middle], stats, max_retries, cache)
+            second_entities, second_failed = await extract_uncached_batch(batch[middle:], stats, max_retries, cache)
+            return first_entities + second_entities, first_failed + second_failed
+
+        all_entities = []
+        failed_blocks = []
+        missing = []
+        for position, (block_index, text_block) in enumerate(batch):
+            if position not in entities_by_position:
+                missing.append((block_index, text_block))
+                continue
+            entities = entities_by_position[position]
+            entities_json = json.dumps(entities) if cache is not None else None
+            entities, failed = validate_block_entities(entities, text_block, stats, block_index, attempt)
+            all_entities.extend(entities)
+            if failed:
+                failed_blocks.append(failed)
+            elif cache is not None:
+                cache.put(text_block["text"], entities_json)
+
+        # Blocks the model skipped are asked for again on their own
+        missing_entities, missing_failed = await extract_blocks_individually(missing, stats, max_retries, cache)
+        return all_entities + missing_entities, failed_blocks + missing_failed
+
+    # Should never reach here
+    return [], []
+
+
+async def extract_blocks_individually(
+    batch: List[Tuple[int, Dict]],
+    stats: ExtractionStats,
+    max_retries: int = 3,
+    cache: Optional[ResponseCache] = None
+) -> Tuple[List[Dict], List[FailedBlock]]:
+    """Extract entities with one LLM call per (block_index, text_block) pair."""
+    all_entities = []
+    failed_blocks = []
+    for block_index, text_block in batch:
+        entities, failed = await extract_entities_with_llm(text_block, stats, block_index, max_retries, cache)
+        all_entities.extend(entities)
+        if failed:
+            failed_blocks.append(failed)
+    return all_entities, failed_blocks
 
 
 def normalize_entity_name(name: str) -> str:
@@ -551,6 +804,7 @@ def load_checkpoint() -> Tuple[List[Dict], ExtractionStats, int, List[Dict]]:
             json_errors=checkpoint['stats'].get('json_errors', 0),
             validation_errors=checkpoint['stats'].get('validation_errors', 0),
             retry_count=checkpoint['stats'].get('retry_count', 0),
+            cache_hits=checkpoint['stats'].get('cache_hits', 0),
             by_type=checkpoint['stats'].get('by_type', {})
         )
 
@@ -577,6 +831,7 @@ def save_checkpoint(entities: List[Dict], stats: ExtractionStats, start_index: i
             "json_errors": stats.json_errors,
             "validation_errors": stats.validation_errors,
             "retry_count": stats.retry_count,
+            "cache_hits": stats.cache_hits,
             "by_type": stats.by_type
         },
         "start_index": start_index,
@@ -587,13 +842,15 @@ def save_checkpoint(entities: List[Dict], stats: ExtractionStats, start_index: i
         json.dump(checkpoint, f)
 
 
-def main():
+async def main():
     """Main execution function."""
     parser = argparse.ArgumentParser(description="Extract medical entities using LLM")
-    parser.add_argument("--num-workers", type=int, default=10, help="Number of parallel workers for processing (default: 5)")
+    parser.add_argument("--num-workers", type=int, default=10, help="Maximum number of concurrent API calls (default: 10)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Number of text blocks sent per API call (default: 8; larger batches degrade output quality)")
     parser.add_argument("--max-blocks", type=int, default=None, help="Maximum number of text blocks to process (for testing)")
     parser.add_argument("--dry-run", action="store_true", help="Print first prompt without executing")
     parser.add_argument("--no-checkpoint", action="store_true", help="Ignore checkpoint and start fresh")
+    parser.add_argument("--no-cache", action="store_true", help="Query the LLM even for blocks with a cached response")
     parser.add_argument("--output-dir", type=str, default=None, help="Custom output directory (default: indexing/output/phase2)")
     args = parser.parse_args()
 
@@ -623,7 +880,10 @@ def main():
     if args.dry_run:
         print("\n[DRY RUN] Sample prompt:")
         print("=" * 80)
-        if text_blocks:
+        sample_batch = [(idx, block) for idx, block in enumerate(text_blocks) if is_extractable(block)][:max(1, args.batch_size)]
+        if len(sample_batch) > 1:
+            print(build_batch_prompt(sample_batch))
+        elif text_blocks:
             sample_block = text_blocks[0]
             sample_prompt = ENTITY_EXTRACTION_PROMPT.format(text=sample_block.get("text", ""))
             print(sample_prompt)
@@ -648,68 +908,79 @@ def main():
         print(f"  Resuming from checkpoint")
 
     print(f"  Total blocks to process: {stats.total_blocks}")
-    print(f"  Using parallel processing with {args.num_workers} workers")
+    print(f"  Using up to {args.num_workers} concurrent API calls")
+    print(f"  Batching up to {max(1, args.batch_size)} blocks per API call")
     print(f"  Retry strategy: 3 attempts with exponential backoff")
 
-    # Process remaining blocks in parallel with progress bar
+    # Responses of earlier runs are reused unless --no-cache is given
+    cache = None if args.no_cache else ResponseCache(RESPONSE_CACHE_FILE)
+    if cache is None:
+        print("  ⚠ Response cache ignored (--no-cache flag)")
+
+    # Process remaining blocks in parallel batches with progress bar
     remaining_blocks = text_blocks[start_index:]
+    batch_size = max(1, args.batch_size)
+    batches = [
+        list(enumerate(remaining_blocks[offset:offset + batch_size], start=start_index + offset))
+        for offset in range(0, len(remaining_blocks), batch_size)
+    ]
     pbar = tqdm(total=len(remaining_blocks), initial=0, desc="  Processing", unit="block")
 
     # Collect results from parallel processing
     all_entities = all_entities or []
     failed_blocks = failed_blocks or []
-    processed_count = 0
+    # Batches finish out of order; results are folded into all_entities (and
+    # the checkpoint) only once every earlier batch has finished, so the
+    # checkpointed start index never skips an unfinished batch
+    finished = {}
+    next_index = start_index
 
-    with ThreadPoolExecutor(max_workers=args.num_workers) as executor:
-        # Submit all tasks
-        futures = {
-            executor.submit(process_block_parallel, block, stats, idx): idx
-            for idx, block in enumerate(remaining_blocks, start=start_index)
-        }
+    # At most num_workers batches have a request in flight at a time
+    semaphore = asyncio.Semaphore(max(1, args.num_workers))
 
-        # Process completed futures as they finish
-        for future in as_completed(futures):
+    async def extract_one(batch: List[Tuple[int, Dict]]):
+        async with semaphore:
             try:
-                entities, failed = future.result()
-                all_entities.extend(entities)
-
-                # Track failed blocks
-                if failed:
-                    failed_blocks.append({
-                        "block_index": failed.block_index,
-                        "chapter_number": failed.chapter_number,
-                        "section_path": failed.section_path,
-                        "text_preview": failed.text_preview,
-                        "error_type": failed.error_type,
-                        "error_message": failed.error_message,
-                        "timestamp": failed.timestamp,
-                        "retry_count": failed.retry_count,
-                        "raw_response": failed.raw_response
-                    })
-
-                with stats_lock:
-                    stats.blocks_processed += 1
-
-                processed_count += 1
-                pbar.update(1)
-
-                # Update progress bar with stats
-                postfix = {
-                    "entities": len(all_entities),
-                    "cost": f"${stats.total_cost:.2f}",
-                    "errors": len(failed_blocks)
-                }
-                pbar.set_postfix(postfix)
-
-                # Save checkpoint every 10 blocks
-                if processed_count % 10 == 0:
-                    save_checkpoint(all_entities, stats, start_index + processed_count, failed_blocks)
-
+                return batch, await extract_entities_batch(batch, stats, cache=cache)
             except Exception as e:
-                print(f"\n  ⚠ Error processing block: {e}")
-                pbar.update(1)
+                return batch, e
+
+    # Process batches as they finish
+    for next_batch in asyncio.as_completed([extract_one(batch) for batch in batches]):
+        batch, result = await next_batch
+        pbar.update(len(batch))
+        if isinstance(result, Exception):
+            print(f"\n  ⚠ Error processing blocks {batch[0][0]}-{batch[-1][0]}: {result}")
+            result = ([], [])
+        finished[batch[0][0]] = (len(batch), result)
+
+        previous_index = next_index
+        while next_index in finished:
+            batch_length, (entities, failed) = finished.pop(next_index)
+            all_entities.extend(entities)
+
+            # Track failed blocks
+            failed_blocks.extend(asdict(failed_block) for failed_block in failed)
+
+            stats.blocks_processed += batch_length
+            next_index += batch_length
+
+        # Update progress bar with stats
+        postfix = {
+            "entities": len(all_entities),
+            "cost": f"${stats.total_cost:.2f}",
+            "errors": len(failed_blocks)
+        }
+        pbar.set_postfix(postfix)
+
+        # Save checkpoint every 10 blocks
+        if next_index // 10 > previous_index // 10:
+            save_checkpoint(all_entities, stats, next_index, failed_blocks)
 
     pbar.close()
+    await client.close()
+    if cache is not None:
+        cache.close()
 
     # Save final checkpoint after completion
     save_checkpoint(all_entities, stats, len(text_blocks), failed_blocks)
@@ -748,6 +1019,7 @@ def main():
             "blocks_processed": stats.blocks_processed,
             "total_blocks": stats.total_blocks,
             "llm_calls": stats.llm_calls,
+            "cache_hits": stats.cache_hits,
             "total_tokens": stats.total_tokens,
             "total_cost_usd": round(stats.total_cost, 2),
             "avg_cost_per_block": round(stats.total_cost / stats.blocks_processed, 4) if stats.blocks_processed > 0 else 0,
@@ -779,6 +1051,7 @@ def main():
     print(f"  • Total: ${stats.total_cost:.2f}")
     print(f"  • Per block: ${stats.total_cost / stats.blocks_processed:.4f}")
     print(f"  • Total tokens: {stats.total_tokens:,}")
+    print(f"  • Cached responses reused: {stats.cache_hits}")
     print(f"\nErrors & Retries:")
     print(f"  • API errors: {stats.api_errors}")
     print(f"  • JSON errors: {stats.json_errors}")
@@ -792,4 +1065,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -3,6 +3,7 @@
 from .wills_eye_parser import (
     WillsEyeParser,
     MedicalEntity,
+    MedicalEntityColumns,
     MedicalRelationship,
     ParsedCondition
 )
@@ -10,6 +11,7 @@ from .wills_eye_parser import (
 __all__ = [
     "WillsEyeParser",
     "MedicalEntity",
+    "MedicalEntityColumns",
     "MedicalRelationship",
     "ParsedCondition"
 ]
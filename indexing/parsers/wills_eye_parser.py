@@ -3,13 +3,16 @@ import json
 import re
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import (
-    NodeType, EdgeType, UrgencyLevel,
+    NodeType, EdgeType, UrgencyLevel, NODE_TYPE_CODES,
     RED_FLAG_KEYWORDS, URGENT_KEYWORDS, NON_URGENT_KEYWORDS,
     ANATOMICAL_TERMS, FIELD_TO_NODE_TYPE
 )
@@ -22,6 +25,40 @@ class MedicalEntity:
     node_type: NodeType
     properties: Dict[str, Any] = field(default_factory=dict)
     source_section: Optional[str] = None
+    type_code: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Resolve the integer node type code once, at construction."""
+        self.type_code = NODE_TYPE_CODES[self.node_type]
+
+
+@dataclass
+class MedicalEntityColumns:
+    """Columnar (struct-of-arrays) view of a list of medical entities.
+
+    Lets type filters run as a single vectorized mask instead of a Python loop.
+    """
+    names: np.ndarray
+    type_codes: np.ndarray
+
+    @classmethod
+    def from_entities(cls, entities: List[MedicalEntity]) -> "MedicalEntityColumns":
+        """Build columns from a list of entities.
+
+        Args:
+            entities: List of medical entities
+
+        Returns:
+            Columnar view with entity names and node type codes
+        """
+        names = np.empty(len(entities), dtype=object)
+        names[:] = [entity.name for entity in entities]
+        type_codes = np.fromiter(
+            (entity.type_code for entity in entities),
+            dtype=np.int8,
+            count=len(entities),
+        )
+        return cls(names=names, type_codes=type_codes)
 
 
 @dataclass
@@ -44,6 +81,15 @@ class ParsedCondition:
     relationships: List[MedicalRelationship] = field(default_factory=list)
     red_flags: List[str] = field(default_factory=list)
 
+    @cached_property
+    def entity_columns(self) -> MedicalEntityColumns:
+        """Columnar view of entities, built lazily on first access.
+
+        Note:
+            Cached; do not mutate ``entities`` after accessing this property.
+        """
+        return MedicalEntityColumns.from_entities(self.entities)
+
 
 class WillsEyeParser:
     """Parser for extracting medical entities from Wills Eye Manual JSON."""